@@ -1,18 +1,26 @@
 import asyncio
+import collections
 import logging
 import os
 import re
 import time
 import traceback
 
+import aiohttp
 import discord
 import discord.ext.commands as commands
 
 import paths
-from utils import config
+from utils import cache, config, monitor, stats, utils
 
 log = logging.getLogger(__name__)
 
+# Number of bot-owned messages kept in cache for later edits
+MESSAGE_CACHE_SIZE = 5000
+
+# Stub commands and listeners of an extension whose loading is deferred
+LazyExtension = collections.namedtuple('LazyExtension', 'commands listeners')
+
 
 class Bot(commands.AutoShardedBot):
     def __init__(self, conf_path=paths.BOT_CONFIG, debug_instance=False):
@@ -22,17 +30,39 @@ class Bot(commands.AutoShardedBot):
         self.start_time = time.time()
         self.conf = config.Config(conf_path, encoding='utf-8')
         self.debug_instance = debug_instance
+        self.message_cache = cache.LRUCache(MESSAGE_CACHE_SIZE)
+        self.message_filters = []
+        self.message_stats = collections.Counter()
+        self.lazy_extensions = {}
+        self.extension_load_times = {}
 
         # Init the framework and load extensions
         super().__init__(description=self.conf.description,
                          command_prefix=commands.when_mentioned_or('€'),
                          help_attrs={'hidden': True})
+
+        # Bot-wide HTTP client, keeping connections alive and caching DNS lookups
+        self.session_stats = utils.SessionStats()
+        connector = aiohttp.TCPConnector(limit=100, limit_per_host=10, ttl_dns_cache=300, loop=self.loop)
+        self.session = aiohttp.ClientSession(connector=connector, loop=self.loop, trace_configs=[self.session_stats.trace_config])
+
+        # Member counts maintained from the gateway events
+        self.member_stats = stats.MemberStats(self)
+
+        # Watch for anything blocking the event loop
+        self.loop_monitor = monitor.LoopMonitor(self.loop)
+        self.loop_monitor.start()
+
         self.load_extensions(paths.COGS_DIR)
 
         # Accept restarts after everything has been initialised without issue
         self.exit_code = True
 
     def load_extensions(self, path):
+        # Extensions listed in the conf's lazy_extensions are only loaded on their first command or event,
+        # e.g. {"cogs.misc": {"commands": ["agarify", "roll"], "events": []}}
+        lazy_extensions = self.conf.lazy_extensions or {}
+
         # Load all the cogs we find in the given path
         for entry in os.scandir(path):
             if entry.is_file():
@@ -43,11 +73,83 @@ class Bot(commands.AutoShardedBot):
                 del tokens[-1]
                 extension = '.'.join(tokens)
 
+                if extension in lazy_extensions:
+                    manifest = lazy_extensions[extension]
+                    self.defer_extension(extension, manifest.get('commands', []), manifest.get('events', []))
+                    continue
+
                 try:
                     self.load_extension(extension)
                 except Exception as e:
                     log.warning(f'Failed to load extension {extension}\n{type(e)}: {e}')
 
+        # Report what each extension cost to start
+        times = sorted(self.extension_load_times.items(), key=lambda t: t[1], reverse=True)
+        log.info(f'Loaded {len(times)} extensions in {sum(t for _, t in times) * 1000:.0f}ms: '
+                 f'{", ".join(f"{name} {t * 1000:.0f}ms" for name, t in times)}')
+        if self.lazy_extensions:
+            log.info(f'Deferred extensions: {", ".join(self.lazy_extensions)}')
+
+    def defer_extension(self, extension, command_names, events):
+        """Registers stubs loading the extension on the first use of one of its commands, or on one of its events."""
+        stub_commands = [self.make_command_stub(extension, name) for name in command_names]
+        for command in stub_commands:
+            self.add_command(command)
+
+        listeners = [(event, self.make_listener_stub(extension, event)) for event in events]
+        for event, listener in listeners:
+            self.add_listener(listener, event)
+
+        self.lazy_extensions[extension] = LazyExtension(stub_commands, listeners)
+
+    def make_command_stub(self, extension, name):
+        async def stub(ctx):
+            if extension not in self.extensions:
+                self.load_extension(extension)
+            # Invoke the real command now that it replaced the stub
+            await self.process_commands(ctx.message)
+
+        return commands.Command(stub, name=name, hidden=True)
+
+    def make_listener_stub(self, extension, event):
+        async def stub(*args, **kwargs):
+            if extension not in self.extensions:
+                self.load_extension(extension)
+            # Forward the event to the extension's listeners, registered too late to get it
+            for cog in list(self.cogs.values()):
+                if type(cog).__module__ == extension:
+                    for name, listener in cog.get_listeners():
+                        if name == event:
+                            await listener(*args, **kwargs)
+
+        return stub
+
+    def load_extension(self, name):
+        # Remove the stubs of a deferred extension before the real commands are added
+        lazy_extension = self.lazy_extensions.pop(name, None)
+        if lazy_extension is not None:
+            for command in lazy_extension.commands:
+                self.remove_command(command.name)
+            for event, listener in lazy_extension.listeners:
+                self.remove_listener(listener, event)
+
+        start = time.perf_counter()
+        try:
+            super().load_extension(name)
+        except Exception:
+            # Put the stubs back
+            if lazy_extension is not None:
+                for command in lazy_extension.commands:
+                    self.add_command(command)
+                for event, listener in lazy_extension.listeners:
+                    self.add_listener(listener, event)
+                self.lazy_extensions[name] = lazy_extension
+            raise
+
+        self.extension_load_times[name] = time.perf_counter() - start
+        if lazy_extension is not None:
+            log.info(f'Loaded deferred extension {name} in {self.extension_load_times[name] * 1000:.0f}ms')
+
     def unload_extensions(self):
         # Unload every cog
         for extension in self.extensions.copy().keys():
@@ -97,12 +199,28 @@ class Bot(commands.AutoShardedBot):
         if message.author.bot:
             return
 
-        # if message.content.startswith ... :3
+        # Drop the messages that cannot lead to a command before building any context
+        if not all(message_filter(message) for message_filter in self.message_filters):
+            self.message_stats['skipped'] += 1
+            return
+
+        self.message_stats['processed'] += 1
         await self.process_commands(message)
 
+    async def on_raw_message_delete(self, payload):
+        self.message_cache.pop(payload.message_id)
+
+    async def on_raw_bulk_message_delete(self, payload):
+        for message_id in payload.message_ids:
+            self.message_cache.pop(message_id)
+
+    def cache_message(self, message):
+        """Keeps a message in cache for later retrieval with get_message."""
+        self.message_cache[message.id] = message
+
     async def get_message(self, channel, message_id):
-        # Look into the cache first
-        message = self._connection._get_message(message_id)
+        # Look into the caches first
+        message = self.message_cache.get(message_id) or self._connection._get_message(message_id)
         if message is not None:
             return message
 
@@ -113,11 +231,16 @@ class Bot(commands.AutoShardedBot):
             if message.id != message_id:
                 return None
 
-            self._connection._messages.append(message)
+            self.cache_message(message)
             return message
         except Exception:
             return None
 
+    async def close(self):
+        await super().close()
+        await self.session.close()
+        self.loop_monitor.stop()
+
     def shutdown(self):
         self.exit_code = False
         # Log out of Discord
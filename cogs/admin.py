@@ -14,42 +14,53 @@ def setup(bot):
     bot.add_cog(Admin(bot))
 
 
+class IgnoreSnapshot(collections.namedtuple('IgnoreSnapshot', 'guilds channels users')):
+    """Immutable view of the ignored guilds, channels and (guild_id, user_id) pairs."""
+    __slots__ = ()
+
+    @classmethod
+    def from_conf(cls, ignored):
+        users = frozenset((guild_id, user_id) for guild_id, user_ids in ignored.users.items() for user_id in user_ids)
+        return cls(frozenset(ignored.guilds), frozenset(ignored.channels), users)
+
+
 class Admin(commands.Cog):
     """Bot management commands and events."""
     def __init__(self, bot):
         self.commands_used = collections.Counter()
-        self.ignored = config.Config(paths.IGNORED_CONFIG, encoding='utf-8')
+        self.ignored = config.Config(paths.IGNORED_CONFIG, encoding='utf-8', loop=bot.loop, debounce=5)
+        self.ignored_snapshot = IgnoreSnapshot.from_conf(self.ignored)
         self.bot = bot
+        self.bot.message_filters.append(self.message_filter)
+
+    def cog_unload(self):
+        self.bot.message_filters.remove(self.message_filter)
+        self.ignored.flush()
+
+    def message_filter(self, message):
+        """Bot message filter, dropping the messages of ignored guilds and channels."""
+        if message.guild is None or message.author.id == self.bot.owner_id:
+            return True
+        ignored = self.ignored_snapshot
+        return message.guild.id not in ignored.guilds and message.channel.id not in ignored.channels
 
     def bot_check_once(self, ctx):
         """A global check used on every command."""
-        author = ctx.author
-        guild = ctx.guild
-        if author == ctx.bot.owner:
+        author_id = ctx.author.id
+        if author_id == ctx.bot.owner_id:
             return True
 
-        if guild is not None:
-            # Check if we're ignoring the guild
-            if guild.id in self.ignored.guilds:
-                return False
-
-            if ctx.channel.id in self.ignored.channels:
-                return False
-
-            # Guild owners can't be ignored
-            if author.id == guild.owner.id:
-                return True
+        guild = ctx.guild
+        if guild is None:
+            return True
 
-            # Check if the user is banned from using the bot
-            if author.id in self.ignored.users.get(guild.id, {}):
-                return False
+        # Check if we're ignoring the guild or the channel
+        ignored = self.ignored_snapshot
+        if guild.id in ignored.guilds or ctx.channel.id in ignored.channels:
+            return False
 
-            # Check if the channel is banned, bypass this if the user has the manage guild permission
-            channel = ctx.channel
-            perms = channel.permissions_for(author)
-            if not perms.manage_guild and channel.id in self.ignored.channels:
-                return False
-        return True
+        # Guild owners can't be ignored, check if the user is banned from using the bot
+        return author_id == guild.owner_id or (guild.id, author_id) not in ignored.users
 
     async def resolve_target(self, ctx, target):
         if target == 'channel':
@@ -147,6 +158,7 @@ class Admin(commands.Cog):
 
         # Save the ignore
         conf[target.id] = reason
+        self.ignored_snapshot = IgnoreSnapshot.from_conf(self.ignored)
         self.ignored.save()
 
         # Leave the server or acknowledge the ignore being successful
@@ -187,6 +199,7 @@ class Admin(commands.Cog):
         else:
             if isinstance(target, discord.Member) and len(conf) == 0:
                 del self.ignored.users[ctx.guild.id]
+            self.ignored_snapshot = IgnoreSnapshot.from_conf(self.ignored)
             self.ignored.save()
             await ctx.message.add_reaction('\N{WHITE HEAVY CHECK MARK}')
 
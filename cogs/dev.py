@@ -3,6 +3,7 @@ import gc
 import inspect
 import io
 import textwrap
+import time
 import traceback
 from contextlib import redirect_stdout
 from collections import Counter
@@ -47,6 +48,15 @@ class Dev(commands.Cog):
         content = utils.indented_entry_to_str(entries)
         await ctx.send(utils.format_block(content))
 
+    @cogs_group.command(name='times')
+    async def cogs_times(self, ctx):
+        """Shows how long each extension took to load."""
+        entries = [(name, f'{seconds * 1000:.0f}ms') for name, seconds in sorted(ctx.bot.extension_load_times.items(), key=lambda t: t[1], reverse=True)]
+        entries += [(name, 'deferred') for name in ctx.bot.lazy_extensions]
+
+        content = utils.indented_entry_to_str(entries)
+        await ctx.send(utils.format_block(content))
+
     @cogs_group.command(name='load')
     async def cogs_load(self, ctx, *, name: str):
         """Loads a cog from name."""
@@ -134,16 +144,40 @@ class Dev(commands.Cog):
     @commands.command()
     async def memory(self, ctx, n=10):
         """Memory info."""
-        members = 0
-        uniques = set()
-        for member in ctx.bot.get_all_members():
-            members += 1
-            uniques.add(member.id)
+        member_stats = ctx.bot.member_stats
+        statuses = ', '.join(f'{count} {status}' for status, count in (+member_stats.statuses).most_common())
         memory = f'{psutil.Process().memory_full_info().uss / 1048576:.2f} Mb'
         objects = Counter(type(o).__name__ for o in gc.get_objects())
         objects_str = utils.format_block(objects.most_common(n), language='py')
 
-        await ctx.send(f'Guilds: {len(ctx.bot.guilds)}\nMembers: {members} ({len(uniques)} uniques)\nMemory: {memory}\nObjects: {objects_str}')
+        messages = f'{ctx.bot.message_stats["processed"]} processed, {ctx.bot.message_stats["skipped"]} skipped'
+
+        await ctx.send(f'Guilds: {len(ctx.bot.guilds)}\nMembers: {member_stats.members} ({member_stats.unique_users} uniques, {statuses})\nMessages: {messages}\nMemory: {memory}\nObjects: {objects_str}')
+
+    @commands.command()
+    async def http(self, ctx):
+        """Shared HTTP session's connection pool info."""
+        stats = ctx.bot.session_stats
+        acquired, idle = stats.open_connections(ctx.bot.session.connector)
+        entries = [
+            ('Open connections', f'{acquired + idle} ({acquired} in use, {idle} idle)'),
+            ('Connections created', stats.created),
+            ('Connections reused', stats.reused),
+            ('Reuse ratio', f'{stats.reuse_ratio:.2%}')
+        ]
+        await ctx.send(utils.format_block(utils.indented_entry_to_str(entries)))
+
+    @commands.command()
+    async def lag(self, ctx):
+        """Event loop lag and latest blocking calls."""
+        loop_monitor = ctx.bot.loop_monitor
+        content = f'Lag: {loop_monitor.mean_lag * 1000:.1f}ms average, {loop_monitor.max_lag * 1000:.1f}ms max (last {len(loop_monitor.lags)} samples)'
+
+        entries = [(time.strftime('%H:%M:%S', time.gmtime(timestamp)), f'{duration:.3f}s in {location}') for timestamp, duration, location in list(reversed(loop_monitor.stalls))[:5]]
+        if entries:
+            content += '\nLatest stalls (UTC):\n' + utils.indented_entry_to_str(entries)
+
+        await ctx.send(utils.format_block(content))
 
     @commands.command()
     async def update(self, ctx):
@@ -161,3 +195,6 @@ class Dev(commands.Cog):
 
         if stdout or stderr:
             await message.edit(embed=embed)
+
+        # Let the cogs refresh what they know about the code
+        ctx.bot.dispatch('code_update')
@@ -1,5 +1,6 @@
+import asyncio
 import collections
-import subprocess
+import logging
 import time
 import unicodedata
 
@@ -8,7 +9,12 @@ import psutil
 import discord
 import discord.ext.commands as commands
 
-from utils import utils
+from utils import cache, utils
+
+log = logging.getLogger(__name__)
+
+# How long a guild's invite lookup is cached, in seconds
+INVITE_CACHE_TTL = 300
 
 
 def setup(bot):
@@ -16,10 +22,142 @@ def setup(bot):
     psutil.cpu_percent()  # Initialise the first interval
 
 
+class GuildSummary:
+    """Cached parts of a guild's info, to be kept up to date from the channel and role events."""
+    def __init__(self, guild):
+        self.locked_text = set()
+        self.locked_voice = set()
+        self.roles = None
+        for channel in guild.channels:
+            self.update_channel(channel)
+
+    def update_channel(self, channel):
+        self.remove_channel(channel)
+        overwrites = channel.overwrites_for(channel.guild.default_role)
+        if isinstance(channel, discord.TextChannel):
+            if overwrites.read_messages is False:
+                self.locked_text.add(channel.id)
+        elif overwrites.connect is False or overwrites.speak is False:
+            self.locked_voice.add(channel.id)
+
+    def remove_channel(self, channel):
+        self.locked_text.discard(channel.id)
+        self.locked_voice.discard(channel.id)
+
+    def get_roles(self, guild):
+        # List the roles other than @everyone
+        if self.roles is None:
+            self.roles = ', '.join(guild.roles[i].name for i in range(1, len(guild.roles)))
+        return self.roles
+
+
 class Info(commands.Cog):
     """When your curiosity takes over."""
     def __init__(self, bot):
         self.bot = bot
+        self.latest_commits = None
+        self.guild_summaries = {}
+        self.guild_invites = cache.LRUCache(1000, ttl=INVITE_CACHE_TTL)
+        bot.loop.create_task(self.update_latest_commits())
+
+    async def update_latest_commits(self):
+        """Caches the summary of the latest commits."""
+        try:
+            process = await asyncio.create_subprocess_exec(
+                'git', 'log', '--pretty=format:[`%h`](https://github.com/PapyrusThePlant/Scarecrow/commit/%h) %s', '-n', '5',
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+            stdout, stderr = await process.communicate()
+        except OSError as e:
+            log.warning(f'Failed to list the latest commits\n{type(e)}: {e}')
+            self.latest_commits = None
+            return
+
+        if process.returncode != 0:
+            log.warning(f'Failed to list the latest commits, git exited with {process.returncode}: {stderr.decode("utf-8").strip()}')
+            self.latest_commits = None
+            return
+
+        self.latest_commits = stdout.decode('utf-8')
+
+    @commands.Cog.listener()
+    async def on_code_update(self):
+        """Called when the bot's code has been updated."""
+        await self.update_latest_commits()
+
+    def get_guild_summary(self, guild):
+        try:
+            return self.guild_summaries[guild.id]
+        except KeyError:
+            summary = self.guild_summaries[guild.id] = GuildSummary(guild)
+            return summary
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        summary = self.guild_summaries.get(channel.guild.id)
+        if summary is not None:
+            summary.update_channel(channel)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        summary = self.guild_summaries.get(after.guild.id)
+        if summary is not None:
+            summary.update_channel(after)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        summary = self.guild_summaries.get(channel.guild.id)
+        if summary is not None:
+            summary.remove_channel(channel)
+
+    def invalidate_roles(self, role):
+        summary = self.guild_summaries.get(role.guild.id)
+        if summary is not None:
+            summary.roles = None
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        self.invalidate_roles(role)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        self.invalidate_roles(after)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self.invalidate_roles(role)
+
+    @commands.Cog.listener()
+    async def on_guild_available(self, guild):
+        # The guild's channels and roles are rebuilt without any channel or role event
+        self.guild_summaries.pop(guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_unavailable(self, guild):
+        self.guild_summaries.pop(guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.guild_summaries.pop(guild.id, None)
+        self.guild_invites.pop(guild.id)
+
+    async def get_guild_invite(self, guild):
+        """Returns the guild's valid and permanent invite with the most uses, if we have permission to see them."""
+        invite = self.guild_invites.get(guild.id, self)
+        if invite is not self:
+            return invite
+
+        invite = None
+        perms = guild.text_channels[0].permissions_for(guild.me)
+        if perms.manage_guild:
+            # Get only permanent and valid invites
+            invites = await guild.invites()
+            invites = [inv for inv in invites if not inv.revoked and inv.max_age == 0]
+            if invites:
+                # Get the invite with the most uses
+                invite = max(invites, key=lambda inv: inv.uses)
+
+        self.guild_invites[guild.id] = invite
+        return invite
 
     @commands.command(aliases=['charinfos'])
     async def charinfo(self, ctx, *, data: str):
@@ -84,16 +222,10 @@ class Info(commands.Cog):
     @commands.group(name='info', aliases=['infos'], invoke_without_command=True)
     async def info_group(self, ctx):
         """Shows information about the bot."""
-        unique_members = set()
-        members_count = 0
-        for member in ctx.bot.get_all_members():
-            members_count += 1
-            unique_members.add(member.id)
-        unique_members_count = len(unique_members)
-
-        members_str = f'{members_count} ({unique_members_count} unique)'
+        member_stats = ctx.bot.member_stats
+        members_str = f'{member_stats.members} ({member_stats.unique_users} unique)'
         owner = (ctx.guild.get_member(ctx.bot.owner.id) if ctx.guild else None) or ctx.bot.owner
-        prefixes = ctx.bot.command_prefix(ctx.bot, ctx.message)
+        prefixes = list(ctx.bot.command_prefix(ctx.bot, ctx.message))
         prefixes.remove(f'{ctx.me.mention.replace("@", "@!")} ')
         prefixes[prefixes.index(f'{ctx.me.mention} ')] = f'@\u200b{ctx.me.display_name} '
 
@@ -116,9 +248,6 @@ class Info(commands.Cog):
         perms = discord.Permissions(486464)
         invite = discord.utils.oauth_url(ctx.bot.app_info.id, perms)
 
-        latest_commits = subprocess.check_output(
-            ['git', 'log', '--pretty=format:[`%h`](https://github.com/PapyrusThePlant/Scarecrow/commit/%h) %s', '-n', '5']).decode('utf-8')
-
         embed = discord.Embed(description=f'[Click here to invite me to your server !]({invite})', colour=discord.Colour.blurple())
         embed.set_thumbnail(url=ctx.me.avatar_url)
         embed.set_author(name=f'Author : {owner}', icon_url=owner.avatar_url)
@@ -128,7 +257,7 @@ class Info(commands.Cog):
         embed.add_field(name='CPU', value=cpu_str)
         embed.add_field(name='Memory', value=mem_str)
         embed.add_field(name='Uptime', value=uptime_str)
-        embed.add_field(name='Latest changes', value=latest_commits, inline=False)
+        embed.add_field(name='Latest changes', value=self.latest_commits or 'Unavailable', inline=False)
         embed.add_field(name='\N{ZERO WIDTH SPACE}', value='For any question about the bot, announcements and an easy way to get in touch with me, feel free to join the dedicated [discord server](https://discord.gg/M85dw9u).')
         embed.set_footer(text='Powered by discord.py', icon_url='http://i.imgur.com/5BFecvA.png')
 
@@ -163,30 +292,18 @@ class Info(commands.Cog):
     async def info_guild(self, ctx):
         """Shows information about the server."""
         guild = ctx.guild
-
-        # List the roles other than @everyone
-        roles = ', '.join(guild.roles[i].name for i in range(1, len(guild.roles)))
+        summary = self.get_guild_summary(guild)
+        roles = summary.get_roles(guild)
 
         # List the guild's features
         features = ', '.join(feature.replace('_', ' ').capitalize() for feature in guild.features) or 'None'
 
-        # Figure out how many channels are locked
-        locked_text = 0
-        locked_voice = 0
-        for channel in guild.channels:
-            overwrites = channel.overwrites_for(guild.default_role)
-            if isinstance(channel, discord.TextChannel):
-                if overwrites.read_messages is False:
-                    locked_text += 1
-            elif overwrites.connect is False or overwrites.speak is False:
-                locked_voice += 1
-
         # Count the channels
-        channels = f'Text : {len(guild.text_channels)} ({locked_text} locked)\n' \
-                   f'Voice : {len(guild.voice_channels)} ({locked_voice} locked)'
+        channels = f'Text : {len(guild.text_channels)} ({len(summary.locked_text)} locked)\n' \
+                   f'Voice : {len(guild.voice_channels)} ({len(summary.locked_voice)} locked)'
 
         # Count the members
-        members_by_status = collections.Counter(f'{m.status}{"_bot" if m.bot else ""}' for m in guild.members)
+        members_by_status = collections.Counter(ctx.bot.member_stats.guild_statuses.get(guild.id, {}))
         members_by_status['online'] += members_by_status['online_bot']
         members_by_status['idle'] += members_by_status['idle_bot']
         members_by_status['offline'] += members_by_status['offline_bot']
@@ -196,17 +313,7 @@ class Info(commands.Cog):
                       'Offline : {1[offline]} ({1[offline_bot]} bots)'
         members = members_fmt.format(len(guild.members), members_by_status)
 
-        # Gather the valid and permanent invites if we have permission to do so
-        invite = None
-        perms = guild.text_channels[0].permissions_for(guild.me)
-        if perms.manage_guild:
-            # Get only permanent and valid invites
-            invites = await guild.invites()
-            invites = [inv for inv in invites if not inv.revoked and inv.max_age == 0]
-            if invites:
-                # Get the invite with the most uses
-                invites.sort(key=lambda inv: inv.uses, reverse=True)
-                invite = invites[0]
+        invite = await self.get_guild_invite(guild)
 
         # Create and fill the embed
         if invite is not None:
@@ -237,7 +344,7 @@ class Info(commands.Cog):
         if member is None:
             member = ctx.author
         roles = ', '.join(role.name.replace('@', '@\u200b') for role in member.roles)
-        shared = sum(1 for m in ctx.bot.get_all_members() if m.id == member.id)
+        shared = ctx.bot.member_stats.shared_guilds(member.id)
 
         if member.voice:
             vc = member.voice.channel
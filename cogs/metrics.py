@@ -0,0 +1,83 @@
+import collections
+import logging
+import time
+
+from aiohttp import web
+import discord.ext.commands as commands
+
+from utils import metrics, utils
+
+log = logging.getLogger(__name__)
+
+
+def setup(bot):
+    bot.add_cog(Metrics(bot))
+
+
+class Metrics(commands.Cog):
+    """Commands latency and throughput instrumentation.
+
+    When the bot's conf has a metrics_port, the metrics are served
+    in the Prometheus text format on http://127.0.0.1:<port>/metrics
+    """
+    def __init__(self, bot):
+        self.bot = bot
+        self.commands = collections.defaultdict(metrics.CommandMetrics)
+        self.runner = None
+        if bot.conf.metrics_port:
+            bot.loop.create_task(self.start_server(bot.conf.metrics_port))
+
+    def cog_unload(self):
+        if self.runner is not None and not self.bot.loop.is_closed():
+            self.bot.loop.create_task(self.runner.cleanup())
+
+    def cog_check(self, ctx):
+        # Owner commands only
+        return ctx.author.id == ctx.bot.owner_id
+
+    async def start_server(self, port):
+        app = web.Application()
+        app.router.add_get('/metrics', self.handle_metrics)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, '127.0.0.1', port).start()
+        log.info(f'Serving metrics on port {port}')
+
+    async def handle_metrics(self, request):
+        return web.Response(text=metrics.commands_to_prometheus(self.commands), content_type='text/plain')
+
+    def on_command_end(self, ctx, failed):
+        started_at = getattr(ctx, 'metrics_started_at', None)
+        if started_at is None:
+            return  # The command never started, e.g. it wasn't found
+        self.commands[ctx.command.qualified_name].on_end(time.perf_counter() - started_at, failed)
+
+    @commands.Cog.listener()
+    async def on_command(self, ctx):
+        ctx.metrics_started_at = time.perf_counter()
+        self.commands[ctx.command.qualified_name].on_start()
+
+    @commands.Cog.listener()
+    async def on_command_completion(self, ctx):
+        self.on_command_end(ctx, failed=False)
+
+    @commands.Cog.listener()
+    async def on_command_error(self, ctx, error):
+        self.on_command_end(ctx, failed=True)
+
+    @commands.command(name='metrics')
+    async def metrics_command(self, ctx, n: int = 15):
+        """Shows the latency of the most used commands."""
+        def fmt(seconds):
+            return 'n/a' if seconds is None else f'{seconds * 1000:.0f}ms'
+
+        entries = []
+        for name, command in sorted(self.commands.items(), key=lambda t: t[1].latency.count, reverse=True)[:n]:
+            latency = command.latency
+            entries.append((name, f'{latency.count} uses, {command.error_rate:.0%} errors, {command.in_flight} running (max {command.max_in_flight}), '
+                                  f'p50 {fmt(latency.quantile(0.5))}, p95 {fmt(latency.quantile(0.95))}, p99 {fmt(latency.quantile(0.99))}'))
+
+        if not entries:
+            raise commands.UserInputError('No command used yet.')
+
+        await ctx.send(utils.format_block(utils.indented_entry_to_str(entries)))
@@ -7,17 +7,21 @@ import discord.ext.commands as commands
 import pyparsing  # requirement of the dice module
 
 import paths
-from utils import agarify, utils
+from utils import agarify, corpus, utils
 
 log = logging.getLogger(__name__)
 
 
 def setup(bot):
-    bot.add_cog(Misc(bot))
+    bot.add_cog(Misc())
 
 
 class Misc(commands.Cog):
     """No comment."""
+    def __init__(self):
+        self.insults = corpus.LineCorpus(paths.INSULTS)
+        self.weeb_names = corpus.RecordCorpus(paths.WEEBNAMES, ('gender', 'name', 'remark'))
+
     @commands.group(invoke_without_command=True)
     async def agarify(self, ctx, *, content):
         """Agarifies a string."""
@@ -28,6 +32,26 @@ class Misc(commands.Cog):
         """Agarifies a user's name."""
         await ctx.send(agarify.agarify(user.display_name, True))
 
+    @agarify.command()
+    @commands.guild_only()
+    async def role(self, ctx, *, role: discord.Role):
+        """Agarifies the names of a role's members.
+
+        Use @everyone for the whole guild, up to 100 members.
+        """
+        members = role.members
+        if not members:
+            raise commands.BadArgument(f'No member has the role {role.name}.')
+        if len(members) > 100:
+            raise commands.BadArgument(f'The role {role.name} has more than 100 members.')
+
+        paginator = commands.Paginator()
+        for member, name in zip(members, agarify.agarify_many([m.display_name for m in members], True)):
+            paginator.add_line(f'{member.display_name}: {name}')
+
+        for page in paginator.pages:
+            await ctx.send(page)
+
     @commands.command(name='8ball')
     async def ball(self, ctx, *, question):
         """Scarecrow's 8-Ball reaches into the future, to find the answers to your questions.
@@ -73,7 +97,7 @@ class Misc(commands.Cog):
         url, loader = random.choice(providers)
 
         try:
-            data = await utils.fetch_page(url, timeout=5)
+            data = await utils.fetch_page(url, session=ctx.bot.session, timeout=5)
         except utils.HTTPError as e:
             log.info(e)
             content = f'Error when querying {url} . This has been logged.'
@@ -88,7 +112,7 @@ class Misc(commands.Cog):
     @commands.command()
     async def insult(self, ctx):
         """Poke the bear."""
-        await ctx.send(utils.random_line(paths.INSULTS))
+        await ctx.send(self.insults.choice())
 
     @commands.command()
     async def roll(self, ctx, *, expression):
@@ -124,12 +148,10 @@ class Misc(commands.Cog):
         A prefered gender can be specified between f(emale), m(ale), x(mixed).
         """
         content = ''
-        for i in range(1, 10):
-            # Get a random name satisfying the wanted gender and kick the '\n' out
-            def predicate(line):
-                return line[0] == wanted_gender
-            line = utils.random_line(paths.WEEBNAMES, predicate if wanted_gender else None)
-            gender, name, remark = line[:-1].split('|')
+        for gender, name, remark in self.weeb_names.sample(9, gender=wanted_gender):
             content += f'[{gender}] {name} {f"({remark})" if remark else ""}\n'
 
+        if not content:
+            raise commands.BadArgument(f'Unknown gender "{wanted_gender}".')
+
         await ctx.send(utils.format_block(content))
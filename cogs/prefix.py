@@ -16,17 +16,28 @@ class Prefix(commands.Cog):
     """Custom prefixes per server."""
     def __init__(self, bot):
         self.bot = bot
-        self.conf = config.Config(paths.PREFIXES_CONFIG, encoding='utf-8')
+        self.conf = config.Config(paths.PREFIXES_CONFIG, encoding='utf-8', loop=bot.loop, debounce=5)
         self.saved_prefixes = self.bot.command_prefix
         self.bot.command_prefix = self.get_prefixes
+        self.bot.message_filters.append(self.message_filter)
+        self.cache = {}  # guild_id -> (prefixes, {first character: prefixes})
 
     def cog_unload(self):
         self.bot.command_prefix = self.saved_prefixes
+        self.bot.message_filters.remove(self.message_filter)
+        self.conf.flush()
+
+    def get_cached_prefixes(self, bot, message):
+        """Returns the prefixes usable for a message, and these prefixes indexed by their first character."""
+        guild_id = message.guild.id if message.guild is not None else None
+        try:
+            return self.cache[guild_id]
+        except KeyError:
+            pass
 
-    def get_prefixes(self, bot, message):
         prefixes = list(self.conf.global_)
-        if message.guild is not None:
-            prefixes += self.conf.guild_specific.get(message.guild.id, [])
+        if guild_id is not None:
+            prefixes += self.conf.guild_specific.get(guild_id, [])
 
         try:
             index = prefixes.index('mention')
@@ -37,10 +48,30 @@ class Prefix(commands.Cog):
             prefixes[index] = mentions[0]
             prefixes.insert(index, mentions[1])
 
-        return prefixes
+        by_first_char = {}
+        for prefix in prefixes:
+            by_first_char.setdefault(prefix[:1], []).append(prefix)
+
+        cached = self.cache[guild_id] = tuple(prefixes), {c: tuple(p) for c, p in by_first_char.items()}
+        return cached
+
+    def get_prefixes(self, bot, message):
+        return self.get_cached_prefixes(bot, message)[0]
+
+    def has_prefix(self, bot, message):
+        """Tells whether a message starts with one of its usable prefixes."""
+        by_first_char = self.get_cached_prefixes(bot, message)[1]
+        content = message.content
+        candidates = by_first_char.get(content[:1], ()) + by_first_char.get('', ())
+        return any(content.startswith(prefix) for prefix in candidates)
+
+    def message_filter(self, message):
+        """Bot message filter, dropping the messages without a prefix."""
+        return self.has_prefix(self.bot, message)
 
     @commands.Cog.listener()
     async def on_guild_remove(self, guild):
+        self.cache.pop(guild.id, None)
         if guild.id in self.conf.guild_specific:
             del self.conf.guild_specific[guild.id]
 
@@ -72,6 +103,7 @@ class Prefix(commands.Cog):
             self.conf.guild_specific[sid] = [prefix]
 
         # Save and acknowledge
+        self.cache.pop(sid, None)
         self.conf.save()
         await ctx.message.add_reaction('\N{WHITE HEAVY CHECK MARK}')
 
@@ -90,5 +122,6 @@ class Prefix(commands.Cog):
         if not prefixes:
             del self.conf.guild_specific[sid]
 
+        self.cache.pop(sid, None)
         self.conf.save()
         await ctx.message.add_reaction('\N{WHITE HEAVY CHECK MARK}')
@@ -1,4 +1,3 @@
-import aiohttp
 import json
 import logging
 
@@ -18,13 +17,10 @@ class PublicStats(commands.Cog):
     """Automated stats collection and publication."""
     def __init__(self, bot):
         self.bot = bot
-        self.session = aiohttp.ClientSession(loop=bot.loop)
+        self.session = bot.session
         self.guild_count = 0
         self.shard_count = 0
 
-    def cog_unload(self):
-        self.session.close()
-
     @commands.Cog.listener()
     async def on_ready(self):
         await self.send_stats()
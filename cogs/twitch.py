@@ -1,8 +1,8 @@
 import asyncio
 import datetime
 import logging
+import time
 
-import aiohttp
 import discord
 import discord.ext.commands as commands
 
@@ -11,6 +11,14 @@ from utils import config, utils
 
 log = logging.getLogger(__name__)
 
+# Delay between the start of two polls of the streams' status, in seconds
+POLL_INTERVAL = 60
+# Maximum number of status chunks fetched at once, and of followed streams updated at once
+POLL_CONCURRENCY = 5
+UPDATE_CONCURRENCY = 10
+# Minimum delay between two refreshes of a live stream's preview image, in seconds
+PREVIEW_REFRESH_INTERVAL = 300
+
 
 def setup(bot):
     raise NotImplementedError()
@@ -23,6 +31,19 @@ class TwitchError(commands.CommandError):
     pass
 
 
+def build_embed(stream_info, image_url):
+    """Builds a live stream notification's embed."""
+    embed = discord.Embed(url=stream_info['channel']['url'],
+                          colour=discord.Colour.blurple(),
+                          title=stream_info['channel']['status'],
+                          description=f'Playing [{stream_info["game"]}](https://www.twitch.tv/directory/game/{stream_info["game"]})')
+    embed.set_author(name=stream_info['channel']['display_name'])
+    embed.set_thumbnail(url=stream_info['channel']['logo'])
+    embed.set_image(url=image_url)
+    embed.timestamp = datetime.datetime.strptime(stream_info['created_at'], '%Y-%m-%dT%H:%M:%SZ')
+    return embed
+
+
 class TwitchConfig(config.ConfigElement):
     def __init__(self, client_id, **kwargs):
         self.client_id = client_id
@@ -52,35 +73,56 @@ class TwitchConfig(config.ConfigElement):
 
 
 class FollowConfig(config.ConfigElement):
-    def __init__(self, stream_id, live=False, preview_url=None, preview_updates=0, **kwargs):
+    def __init__(self, stream_id, live=False, preview_url=None, preview_updates=0, title=None, game=None, preview_refreshed_at=0, **kwargs):
         self.stream_id = stream_id
         self.live = live
         self.preview_url = preview_url
         self.preview_updates = preview_updates
+        self.title = title
+        self.game = game
+        self.preview_refreshed_at = preview_refreshed_at
         self.channels = utils.dict_keys_to_int(kwargs.pop('channels', {}))
 
+    def on_notified(self, stream_info):
+        self.title = stream_info['channel']['status']
+        self.game = stream_info['game']
+        self.preview_refreshed_at = time.time()
+
     async def put_offline(self, bot):
         for channel_conf in self.channels.values():
             await channel_conf.put_offline(bot)
         self.preview_updates = 0
+        self.title = None
+        self.game = None
         self.live = False
 
     async def update(self, bot, stream_info):
-        url = f'{self.preview_url}?v={str(self.preview_updates + 1)}'
-        for channel_id, chan_conf in self.channels.items():
-            message = await chan_conf.get_message(bot)
-            if not message or not message.embeds: # Sometimes embeds disappear
-                await chan_conf.put_offline(bot)
-                continue
+        title = stream_info['channel']['status']
+        game = stream_info['game']
+        refresh_preview = time.time() - self.preview_refreshed_at >= PREVIEW_REFRESH_INTERVAL
+        if title == self.title and game == self.game and not refresh_preview:
+            return
 
-            # Update the stream preview, title and played game
-            embed = message.embeds[0]
-            embed.set_image(url=url)
-            embed.title = stream_info['channel']['status']
-            embed.description = f'Playing [{stream_info["game"]}](https://www.twitch.tv/directory/game/{stream_info["game"]})'
+        # Bust Discord's image cache when the preview needs refreshing
+        preview_updates = self.preview_updates + 1 if refresh_preview else self.preview_updates
+        embed = build_embed(stream_info, f'{self.preview_url}?v={preview_updates}').to_dict()
 
-            await message.edit(embed=embed)
-        self.preview_updates += 1
+        async def edit(chan_conf):
+            # Edit by ID, without fetching the message first
+            try:
+                await bot.http.edit_message(chan_conf.id, chan_conf.message_id, embed=embed)
+            except discord.NotFound:
+                bot.message_cache.pop(chan_conf.message_id)
+                chan_conf.message_id = None
+
+        chan_confs = [c for c in self.channels.values() if c.message_id is not None]
+        await utils.bounded_gather((edit(c) for c in chan_confs), UPDATE_CONCURRENCY)
+
+        self.title = title
+        self.game = game
+        if refresh_preview:
+            self.preview_updates = preview_updates
+            self.preview_refreshed_at = time.time()
 
 
 class ChannelConfig(config.ConfigElement):
@@ -88,12 +130,9 @@ class ChannelConfig(config.ConfigElement):
         self.id = id
         self.content = content
         self.message_id = message_id
-        self._message = None
 
     async def get_message(self, bot):
-        if self._message is None:
-            self._message = await bot.get_message(bot.get_channel(self.id), self.message_id)
-        return self._message
+        return await bot.get_message(bot.get_channel(self.id), self.message_id)
 
     async def put_offline(self, bot):
         if self.message_id is None:
@@ -103,7 +142,6 @@ class ChannelConfig(config.ConfigElement):
         message = await self.get_message(bot)
         if not message or not message.embeds: # Sometimes embeds disappear
             self.message_id = None
-            self._message = None
             return
 
         embed = message.embeds[0]
@@ -116,8 +154,8 @@ class ChannelConfig(config.ConfigElement):
 
         # Send the edit and remove the message's reference in the conf
         await message.edit(embed=embed)
+        bot.message_cache.pop(self.message_id)
         self.message_id = None
-        self._message = None
 
 
 class Twitch:
@@ -126,17 +164,17 @@ class Twitch:
 
     def __init__(self, bot):
         self.bot = bot
-        self.conf = config.Config(paths.TWITCH_CONFIG, encoding='utf-8')
-        default_headers = {
+        self.conf = config.Config(paths.TWITCH_CONFIG, encoding='utf-8', loop=bot.loop, debounce=5)
+        self.headers = {
             'Client-ID': self.conf.client_id,
             'Accept': 'application/vnd.twitchtv.v5+json'
         }
-        self.session = aiohttp.ClientSession(loop=bot.loop, headers=default_headers)
+        self.session = bot.session
         self.daemon = None
 
     def __unload(self):
-        self.session.close()
         self.daemon.cancel()
+        self.conf.flush()
 
     async def on_guild_channel_delete(self, channel):
         self.conf.remove_channels(channel)
@@ -147,14 +185,21 @@ class Twitch:
         self.conf.save()
 
     async def on_ready(self):
+        await self.warm_up_messages()
         self.start()
 
+    async def warm_up_messages(self):
+        """Fills the bot's message cache with the notifications of the live streams."""
+        channel_confs = [c for follow_conf in self.conf.follows.values() for c in follow_conf.channels.values() if c.message_id is not None]
+        await utils.bounded_gather((c.get_message(self.bot) for c in channel_confs), UPDATE_CONCURRENCY)
+
     def start(self):
         if self.daemon is None:
             self.daemon = self.bot.loop.create_task(self._daemon())
 
     async def _daemon(self):
         # ERMAHGERD ! MAH FRAVRIT LERP !
+        next_poll = self.bot.loop.time()
         while True:
             try:
                 streams = await self.poll_streams()
@@ -162,47 +207,58 @@ class Twitch:
                 log.info(f'Polling error: {e}')
             else:
                 await self.bot.wait_until_ready()
-                for stream_id, follow_conf in self.conf.follows.copy().items():
-                    if follow_conf.live:
-                        if stream_id not in streams:
-                            try:
-                                # Stream went offline, remove the preview images
-                                await follow_conf.put_offline(self.bot)
-                            except Exception as e:
-                                log.error(f'Preview removal error: {e}')
-                        else:
-                            try:
-                                # Stream is still online, update its info
-                                await follow_conf.update(streams[stream_id])
-                            except Exception as e:
-                                log.error(f'Update error: {e}')
-                    elif stream_id in streams:
-                        # Stream came online, save the preview url and send notifications
-                        stream_info = streams[stream_id]
-                        follow_conf.preview_url = stream_info['preview']['template'].format(width=640, height=360)
-                        try:
-                            await self.notify(stream_info)
-                        except Exception as e:
-                            log.error(f'Notification error: {e}')
-                        else:
-                            follow_conf.live = True
-                    self.conf.save()
+                follows = self.conf.follows.copy().items()
+                await utils.bounded_gather((self.update_follow(stream_id, follow_conf, streams) for stream_id, follow_conf in follows), UPDATE_CONCURRENCY)
+                self.conf.save()
             finally:
-                await asyncio.sleep(60)
+                # Keep a fixed cadence, and skip the polls we're too late for
+                now = self.bot.loop.time()
+                next_poll += POLL_INTERVAL
+                if next_poll < now:
+                    next_poll += (now - next_poll) // POLL_INTERVAL * POLL_INTERVAL + POLL_INTERVAL
+                await asyncio.sleep(next_poll - now)
+
+    async def update_follow(self, stream_id, follow_conf, streams):
+        if follow_conf.live:
+            if stream_id not in streams:
+                try:
+                    # Stream went offline, remove the preview images
+                    await follow_conf.put_offline(self.bot)
+                except Exception as e:
+                    log.error(f'Preview removal error: {e}')
+            else:
+                try:
+                    # Stream is still online, update its info
+                    await follow_conf.update(self.bot, streams[stream_id])
+                except Exception as e:
+                    log.error(f'Update error: {e}')
+        elif stream_id in streams:
+            # Stream came online, save the preview url and send notifications
+            stream_info = streams[stream_id]
+            follow_conf.preview_url = stream_info['preview']['template'].format(width=640, height=360)
+            try:
+                await self.notify(stream_info)
+            except Exception as e:
+                log.error(f'Notification error: {e}')
+            else:
+                follow_conf.live = True
 
     async def poll_streams(self):
-        streams = {}
-
         # Get the streams statuses in chunks of 100
         channels = list(self.conf.follows.keys())
-        for i in range(0, len(channels), 100):
+
+        async def fetch_chunk(i):
             chunk = channels[i:i + 100]
             try:
-                streams_chunk = await utils.fetch_page(f'{self.api_base}/streams', session=self.session, params={'channel': ', '.join(chunk), 'limit': 100})
+                return await utils.fetch_page(f'{self.api_base}/streams', session=self.session, headers=self.headers, params={'channel': ', '.join(chunk), 'limit': 100})
             except utils.HTTPError as e:
-                raise Exception(f'HTTP error when fetching streams chunk #{i / 100 + 1} : {e}') from e
+                raise Exception(f'HTTP error when fetching streams chunk #{i // 100 + 1} : {e}') from e
+
+        chunks = await utils.bounded_gather((fetch_chunk(i) for i in range(0, len(channels), 100)), POLL_CONCURRENCY)
 
-            # Extract the newly live streams
+        # Extract the live streams
+        streams = {}
+        for streams_chunk in chunks:
             for stream_info in streams_chunk['streams']:
                 stream_id = str(stream_info['channel']['_id'])
                 streams[stream_id] = stream_info
@@ -210,29 +266,23 @@ class Twitch:
         return streams
 
     async def notify(self, stream_info):
-        # Build the embed
-        embed = discord.Embed(url=stream_info['channel']['url'],
-                              colour=discord.Colour.blurple(),
-                              title=stream_info['channel']['status'],
-                              description=f'Playing [{stream_info["game"]}](https://www.twitch.tv/directory/game/{stream_info["game"]})')
-        embed.set_author(name=stream_info['channel']['display_name'])
-        embed.set_thumbnail(url=stream_info['channel']['logo'])
-        embed.set_image(url=stream_info['preview']['large'])
-        embed.timestamp = datetime.datetime.strptime(stream_info['created_at'], '%Y-%m-%dT%H:%M:%SZ')
+        embed = build_embed(stream_info, stream_info['preview']['large'])
 
         # Send the notification to every interested channel
-        for channel_id, chan_conf in self.conf.follows[str(stream_info['channel']['_id'])].channels.items():
+        follow_conf = self.conf.follows[str(stream_info['channel']['_id'])]
+        follow_conf.on_notified(stream_info)
+        for channel_id, chan_conf in follow_conf.channels.items():
             destination = self.bot.get_channel(channel_id)
             if not destination.permissions_for(self.bot.user).embed_links:
                 await destination.send(f'Missing permissions to embed links to send stream notification for {stream_info["channel"]["url"]}. Retrying later.')
             else:
-                chan_conf._message = await destination.send(chan_conf.content, embed=embed)
-                chan_conf.message_id = chan_conf._message.id
-                self.conf.save()
+                message = await destination.send(chan_conf.content, embed=embed)
+                self.bot.cache_message(message)
+                chan_conf.message_id = message.id
 
     async def get_user(self, channel):
         try:
-            data = await utils.fetch_page(f'{self.api_base}/users', session=self.session, params={'login': channel})
+            data = await utils.fetch_page(f'{self.api_base}/users', session=self.session, headers=self.headers, params={'login': channel})
         except utils.HTTPError as e:
             if e.code == 400:
                 raise commands.BadArgument(e.message)
@@ -274,11 +324,12 @@ class Twitch:
         self.conf.save()
 
         # Check if the channel is live
-        streams = await utils.fetch_page(f'{self.api_base}/streams', session=self.session, params={'channel': user_id})
+        streams = await utils.fetch_page(f'{self.api_base}/streams', session=self.session, headers=self.headers, params={'channel': user_id})
         if streams['_total'] == 1:
             self.conf.follows[user_id].preview_url = streams['streams'][0]['preview']['template'].format(width=640, height=360)
             await self.notify(streams['streams'][0])
             self.conf.follows[user_id].live = True
+            self.conf.save()
 
         await ctx.message.add_reaction('\N{WHITE HEAVY CHECK MARK}')
 
@@ -1,14 +1,34 @@
+import asyncio
+import collections
+import collections.abc
 import logging
+import time
 
 import discord
 import discord.ext.commands as commands
 import peony
 
-from utils import config
+import paths
+from utils import cache, config, utils
 
 log = logging.getLogger(__name__)
 logging.getLogger('peony').setLevel(logging.WARNING)
 
+# Maximum number of channels a tweet is sent to at once, discord.py takes care of the per-route buckets
+DISPATCH_CONCURRENCY = 10
+# Maximum number of timelines fetched at once when catching up
+TIMELINE_CONCURRENCY = 5
+# Delay during which follow changes are batched before reconnecting the stream, in seconds
+STREAM_UPDATE_DELAY = 15
+# Maximum number of users followed by a single filter stream connection
+STREAM_FOLLOW_LIMIT = 5000
+# Number of tasks delivering the streamed tweets, and the maximum number of tweets waiting for them
+DELIVERY_WORKERS = 4
+DELIVERY_QUEUE_SIZE = 1000
+# Number of (tweet, channel) deliveries remembered to skip duplicates, and for how long, in seconds
+DELIVERED_CACHE_SIZE = 10000
+DELIVERED_CACHE_TTL = 3600
+
 
 def setup(bot):
     """Extension's entry point."""
@@ -34,6 +54,130 @@ def build_tweet_url(screen_name, tweet_id):
     return f'https://twitter.com/{screen_name}/status/{tweet_id}'
 
 
+def tweet_timestamp(tweet_id):
+    """Extracts the creation timestamp of a tweet from its snowflake ID."""
+    return ((tweet_id >> 22) + 1288834974657) / 1000
+
+
+class StreamShard:
+    """A filter stream connection, following its share of the followed users."""
+    def __init__(self, shard_id, client):
+        self.id = shard_id
+        self.client = client
+        self.user_ids = set()
+        self.task = None
+        self.catch_up_task = None
+        self.catch_up_ids = None
+        self.connected_at = None
+        self.tweets = 0
+        self.lag = None
+
+    @property
+    def throughput(self):
+        """Tweets received per minute since the connection was established."""
+        if self.connected_at is None:
+            return 0.0
+        return self.tweets * 60 / max(time.time() - self.connected_at, 1)
+
+    def on_connect(self):
+        self.connected_at = time.time()
+        self.tweets = 0
+
+    def on_tweet(self, tweet):
+        self.tweets += 1
+        self.lag = time.time() - tweet_timestamp(tweet['id'])
+
+
+class FollowIndex:
+    """Reverse lookups into the follows' conf, to be kept up to date with every change made to it."""
+    def __init__(self):
+        self.screen_names = {}  # screen_name -> user_id
+        self.channels = {}  # channel_id -> {user_id}
+        self.guilds = {}  # guild_id -> {channel_id}
+        self.channel_guilds = {}  # channel_id -> guild_id
+
+    def rebuild(self, follows, bot):
+        """Indexes the whole follows' conf."""
+        self.screen_names.clear()
+        self.channels.clear()
+        self.guilds.clear()
+        self.channel_guilds.clear()
+        for user_id, conf in follows.items():
+            for channel_id in conf.channels:
+                channel = bot.get_channel(channel_id)
+                self.add(user_id, conf.screen_name, channel_id, channel.guild.id if channel else None)
+
+    def add(self, user_id, screen_name, channel_id, guild_id=None):
+        """Indexes a channel following a user."""
+        self.screen_names[screen_name] = user_id
+        self.channels.setdefault(channel_id, set()).add(user_id)
+        if guild_id is not None:
+            self.guilds.setdefault(guild_id, set()).add(channel_id)
+            self.channel_guilds[channel_id] = guild_id
+
+    def add_guild(self, guild):
+        """Indexes the guild of its channels following users, e.g. when they weren't cached at the last rebuild."""
+        for channel in guild.text_channels:
+            if channel.id in self.channels:
+                self.guilds.setdefault(guild.id, set()).add(channel.id)
+                self.channel_guilds[channel.id] = guild.id
+
+    def remove(self, user_id, channel_id):
+        """Removes a channel following a user from the index."""
+        user_ids = self.channels.get(channel_id)
+        if user_ids is None:
+            return
+        user_ids.discard(user_id)
+        if user_ids:
+            return
+
+        # The channel doesn't follow anyone anymore
+        del self.channels[channel_id]
+        guild_id = self.channel_guilds.pop(channel_id, None)
+        if guild_id is not None:
+            channel_ids = self.guilds[guild_id]
+            channel_ids.discard(channel_id)
+            if not channel_ids:
+                del self.guilds[guild_id]
+
+    def remove_user(self, screen_name):
+        """Removes an unfollowed user from the index."""
+        self.screen_names.pop(screen_name, None)
+
+
+class DeliveryQueue:
+    """Bounded queues between the streams and the delivery workers.
+
+    Tweets are spread across the workers' queues by user ID to deliver each user's tweets in order.
+    When a queue is full, its oldest tweet is dropped to make room for the new one.
+    """
+    def __init__(self, workers, maxsize):
+        self.queues = [asyncio.Queue(maxsize=max(1, maxsize // workers)) for _ in range(workers)]
+        self.dropped = 0
+        self.delivered = 0
+        self.latencies = collections.deque(maxlen=1000)
+
+    def __len__(self):
+        return sum(queue.qsize() for queue in self.queues)
+
+    def put(self, tweet):
+        """Queues a tweet for delivery, without waiting."""
+        queue = self.queues[tweet['user']['id'] % len(self.queues)]
+        if queue.full():
+            _, dropped = queue.get_nowait()
+            self.dropped += 1
+            log.warning(f'Delivery queue full, dropped tweet {dropped["id"]}')
+        queue.put_nowait((time.monotonic(), tweet))
+
+    async def get(self, worker_id):
+        """Waits for the next tweet to be delivered by the given worker."""
+        return await self.queues[worker_id].get()
+
+    def on_delivered(self, queued_at):
+        self.delivered += 1
+        self.latencies.append(time.monotonic() - queued_at)
+
+
 class Twitter(commands.Cog):
     """Follow Twitter accounts and stream their tweets in Discord.
 
@@ -42,14 +186,36 @@ class Twitter(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
-        self.conf = config.Config('conf/twitter.json', encoding='utf-8')
-        self.twitter_client = peony.PeonyClient(**self.conf.credentials)
-        self.stream_task = None
+        self.conf = config.Config(paths.TWITTER_CONFIG, encoding='utf-8', loop=bot.loop, debounce=5)
+
+        # Each set of credentials gets its own stream connection, the first one is also used for the REST API
+        credentials = self.conf.credentials
+        if isinstance(credentials, collections.abc.Mapping):
+            credentials = [credentials]
+        self.twitter_clients = [peony.PeonyClient(**c) for c in credentials]
+        self.twitter_client = self.twitter_clients[0]
+        self.shards = [StreamShard(i, client) for i, client in enumerate(self.twitter_clients)]
+
+        self.timeline_reset = 0
+        self.stream_update_handle = None
+        self.stream_added = set()
+        self.index = FollowIndex()
+        self.index.rebuild(self.conf.follows, bot)
+
+        # The streams only queue the tweets, the delivery is left to the workers
+        self.delivery_queue = DeliveryQueue(DELIVERY_WORKERS, DELIVERY_QUEUE_SIZE)
+        self.delivered = cache.LRUCache(DELIVERED_CACHE_SIZE, ttl=DELIVERED_CACHE_TTL)
+        self.delivery_workers = [bot.loop.create_task(self.deliver_tweets(i)) for i in range(DELIVERY_WORKERS)]
         self.stream_start()
 
     def cog_unload(self):
         """Handles special unloading."""
+        if self.stream_update_handle is not None:
+            self.stream_update_handle.cancel()
         self.stream_stop()
+        for worker in self.delivery_workers:
+            worker.cancel()
+        self.conf.flush()
 
     def cog_check(self, ctx):
         """Extra checks for the cog's commands."""
@@ -64,35 +230,69 @@ class Twitter(commands.Cog):
 
         await ctx.message.add_reaction('\N{CROSS MARK}')
 
-    def remove_channels_from_conf(self, *channels):
-        """Remove the given channel from the conf."""
+    def add_follow(self, user_id, screen_name, channel, last_tweet_id):
+        """Makes the given channel follow a user, returns whether the user wasn't followed yet."""
+        conf = self.conf.follows.get(user_id)
+        followed = conf is None
+        if followed:
+            conf = config.ConfigElement(screen_name=screen_name, channels={})
+            self.conf.follows[user_id] = conf
+
+        conf.channels[channel.id] = config.ConfigElement(last_tweet_id=last_tweet_id)
+        self.index.add(user_id, screen_name, channel.id, channel.guild.id)
+        return followed
+
+    def remove_follow(self, user_id, channel_id):
+        """Makes the given channel stop following a user, returns whether the user isn't followed anymore."""
+        conf = self.conf.follows[user_id]
+        del conf.channels[channel_id]
+        self.index.remove(user_id, channel_id)
+
+        unfollowed = len(conf.channels) == 0
+        if unfollowed:
+            del self.conf.follows[user_id]
+            self.index.remove_user(conf.screen_name)
+        return unfollowed
+
+    def remove_channels_from_conf(self, *channel_ids):
+        """Remove the given channels from the conf."""
         removed = 0
         unfollowed = 0
-        channels = set(channels)
-        for user_id, conf in self.conf.follows.copy().items():
-            for c in channels & set(conf.channels):
-                conf.channels.pop(c)
+        for channel_id in channel_ids:
+            for user_id in self.index.channels.get(channel_id, set()).copy():
                 removed += 1
+                if self.remove_follow(user_id, channel_id):
+                    unfollowed += 1
 
-            if len(conf.channels) == 0:
-                del self.conf.follows[user_id]
-                unfollowed += 1
-        self.conf.save()
+        if removed > 0:
+            self.conf.save()
 
         if unfollowed > 0:
-            self.stream_restart()
+            self.stream_update()
         return removed, unfollowed
 
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Called when the bot is ready, with its channels cache filled."""
+        self.index.rebuild(self.conf.follows, self.bot)
+
+    @commands.Cog.listener()
+    async def on_guild_available(self, guild):
+        """Called when a guild becomes available, with its channels cache filled."""
+        self.index.add_guild(guild)
+
     @commands.Cog.listener()
     async def on_guild_channel_delete(self, channel):
         """Called when a channel is deleted."""
-        removed, unfollowed = self.remove_channels_from_conf(channel)
+        removed, unfollowed = self.remove_channels_from_conf(channel.id)
         log.info(f'Deletion of channel {channel.id} removed {removed} feeds and unfollowed {unfollowed}')
 
     @commands.Cog.listener()
     async def on_guild_remove(self, guild):
         """Called when the bot leaves a guild."""
-        removed, unfollowed = self.remove_channels_from_conf(c.id for c in guild.text_channels)
+        # The guild's channels might never have been indexed if it was unavailable
+        channel_ids = self.index.guilds.get(guild.id, set()) | {c.id for c in guild.text_channels}
+        removed, unfollowed = self.remove_channels_from_conf(*channel_ids)
         log.info(f'Removal of guild {guild.id} removed {removed} feeds and unfollowed {unfollowed}')
 
     async def dispatch_tweet(self, tweet):
@@ -103,13 +303,38 @@ class Twitter(commands.Cog):
         except KeyError:
             return  # Apparently peony dispatch retweets of any users we're following as well
 
-        for channel_id in conf.channels:
-            await self.bot.get_channel(int(channel_id)).send(tweet_url)
-            conf.channels[channel_id].last_tweet_id = tweet['id']
-            self.conf.save()
+        async def send(channel_id):
+            channel = self.bot.get_channel(channel_id)
+            if channel is None:
+                return
+
+            # Skip tweets already delivered, e.g. received from both the stream and catching up
+            key = (tweet['id'], channel_id)
+            if key in self.delivered:
+                return
+            self.delivered[key] = True
+
+            try:
+                await channel.send(tweet_url)
+            except discord.HTTPException as e:
+                self.delivered.pop(key)
+                log.warning(f'Failed to send tweet {tweet["id"]} to channel {channel_id}: {e}')
+            else:
+                # The channel may have been removed from the conf while we were sending
+                chan_conf = conf.channels.get(channel_id)
+                if chan_conf is not None:
+                    # Catching up and streaming run concurrently, never go back in time
+                    chan_conf.last_tweet_id = max(chan_conf.last_tweet_id, tweet['id'])
+
+        # Send to every channel concurrently and save the progress once they're all done
+        await utils.bounded_gather((send(channel_id) for channel_id in list(conf.channels)), DISPATCH_CONCURRENCY)
+        self.conf.save()
+
+    async def get_timeline(self, user_id=None, screen_name=None, limit: int = 3, wait=False):
+        """Returns a list of tweet from the given user's timeline.
 
-    async def get_timeline(self, user_id=None, screen_name=None, limit: int = 3):
-        """Returns a list of tweet from the given user's timeline."""
+        If the rate limit is exhausted, waits for its reset when `wait` is set, raises a TwitterError otherwise.
+        """
         params = {
             'exclude_replies': True,
             'include_rts': True,
@@ -127,59 +352,200 @@ class Twitter(commands.Cog):
         else:
             params['count'] = limit
 
+        if wait:
+            await self.wait_timeline_rate_limit()
+        else:
+            delay = self.timeline_reset - time.time()
+            if delay > 0:
+                raise TwitterError(f'Twitter rate limit reached, try again in {utils.duration_to_str(int(delay) + 1)}.')
+
         request = self.twitter_client.api.statuses.user_timeline.get(**params)
         responses = request.iterator.with_since_id(force=False)
 
         tweets = []
         async for chunk in responses:
             tweets.extend(chunk)
+            self.update_timeline_rate_limit(chunk.headers)
+            if wait:
+                await self.wait_timeline_rate_limit()
         return tweets
 
-    async def get_timelines(self):
-        """Get the timeline from all the followed users."""
-        for user_id, conf in self.conf.follows.items():
-            yield await self.get_timeline(user_id=user_id)
+    def update_timeline_rate_limit(self, headers):
+        """Registers the user timeline's rate limit from a response's headers."""
+        try:
+            remaining = int(headers['x-rate-limit-remaining'])
+            reset = int(headers['x-rate-limit-reset'])
+        except (KeyError, TypeError, ValueError):
+            return
 
-    async def update_feeds(self):
-        """Update the feeds with their missing twets, if any."""
-        async for timeline in self.get_timelines():
-            for timeline_tweet in reversed(timeline):
-                await self.dispatch_tweet(timeline_tweet)
+        # Keep a request per concurrent fetch in reserve, they might already be on their way
+        if remaining <= TIMELINE_CONCURRENCY:
+            self.timeline_reset = max(self.timeline_reset, reset)
 
-    def stream_start(self):
-        """Starts the Twitter stream."""
-        if len(self.conf.follows) > 0 and self.stream_task is None:
-            self.stream_task = self.bot.loop.create_task(self.stream_tweets())
+    async def wait_timeline_rate_limit(self):
+        """Waits for the user timeline's rate limit to reset if it is exhausted."""
+        delay = self.timeline_reset - time.time()
+        if delay > 0:
+            log.info(f'User timeline rate limit reached, waiting {delay:.0f} seconds')
+            await asyncio.sleep(delay)
 
-    def stream_stop(self):
-        """Stops the Twitter stream."""
-        if self.stream_task is not None:
-            self.stream_task.cancel()
-            self.stream_task = None
+    async def update_feeds(self, user_ids=None):
+        """Update the feeds with their missing tweets, if any.
 
-    def stream_restart(self):
-        """Restarts the Twitter stream."""
-        self.stream_stop()
-        self.stream_start()
+        Only the given users are updated, or every followed user if none are given.
+        """
+        if user_ids is None:
+            user_ids = list(self.conf.follows.keys())
+        else:
+            user_ids = [user_id for user_id in user_ids if user_id in self.conf.follows]
+        timelines = await utils.bounded_gather((self.get_timeline(user_id=user_id, wait=True) for user_id in user_ids), TIMELINE_CONCURRENCY, return_exceptions=True)
+
+        tweets = []
+        for user_id, timeline in zip(user_ids, timelines):
+            if isinstance(timeline, Exception):
+                log.warning(f'Failed to fetch the timeline of user {user_id}: {timeline}')
+            else:
+                tweets.extend(timeline)
+
+        # Dispatch the missed tweets in order, from the oldest to the most recent
+        for tweet in sorted(tweets, key=lambda t: t['id']):
+            await self.dispatch_tweet(tweet)
+
+    def catch_up_start(self, shard, user_ids=None):
+        """Starts catching up on a shard's missed tweets, alongside its stream."""
+        self.catch_up_stop(shard)
+        shard.catch_up_task = self.bot.loop.create_task(self.update_feeds(shard.user_ids if user_ids is None else user_ids))
+
+    def catch_up_stop(self, shard):
+        """Stops catching up on a shard's missed tweets."""
+        if shard.catch_up_task is not None:
+            shard.catch_up_task.cancel()
+            shard.catch_up_task = None
+
+    def partition_follows(self):
+        """Splits the followed users across the stream shards."""
+        partitions = [set() for _ in self.shards]
+        for user_id in self.conf.follows.keys():
+            partitions[user_id % len(self.shards)].add(user_id)
+        return partitions
+
+    def shard_running(self, shard):
+        """Whether a shard's stream is running, logging why it stopped if it died."""
+        if shard.task is None:
+            return False
+        if not shard.task.done():
+            return True
+
+        if not shard.task.cancelled() and shard.task.exception() is not None:
+            e = shard.task.exception()
+            log.error(f'Stream shard #{shard.id} stopped\n{type(e)}: {e}')
+        # Forget the dead task so it's only reported once
+        shard.task = None
+        return False
+
+    def stream_start(self):
+        """Starts the Twitter streams."""
+        for shard, user_ids in zip(self.shards, self.partition_follows()):
+            if not self.shard_running(shard) and len(user_ids) > 0:
+                self.shard_start(shard, user_ids)
 
-    async def stream_tweets(self):
+    def stream_stop(self):
+        """Stops the Twitter streams."""
+        for shard in self.shards:
+            self.shard_stop(shard)
+
+    def shard_start(self, shard, user_ids, catch_up_ids=None):
+        """Starts a shard's stream, following the given users."""
+        if len(user_ids) > STREAM_FOLLOW_LIMIT:
+            log.warning(f'Stream shard #{shard.id} follows {len(user_ids)} users, over the limit of {STREAM_FOLLOW_LIMIT}')
+
+        shard.user_ids = user_ids
+        shard.catch_up_ids = catch_up_ids
+        shard.task = self.bot.loop.create_task(self.stream_tweets(shard))
+
+    def shard_stop(self, shard):
+        """Stops a shard's stream."""
+        self.catch_up_stop(shard)
+        if shard.task is not None:
+            shard.task.cancel()
+            shard.task = None
+        shard.connected_at = None
+
+    def stream_update(self, *added):
+        """Schedules the streams' update to apply changes to the followed users.
+
+        Changes made within STREAM_UPDATE_DELAY are applied together with a single reconnection
+        of the affected shards, after which only the newly followed users are caught up on.
+        """
+        self.stream_added.update(added)
+        if self.stream_update_handle is None:
+            self.stream_update_handle = self.bot.loop.call_later(STREAM_UPDATE_DELAY, self._stream_update)
+
+    def _stream_update(self):
+        self.stream_update_handle = None
+        added, self.stream_added = self.stream_added, set()
+
+        # Rebalance the followed users, only reconnecting the shards whose share changed
+        for shard, user_ids in zip(self.shards, self.partition_follows()):
+            running = self.shard_running(shard)
+            if running and user_ids == shard.user_ids:
+                continue
+
+            if not running:
+                # Everyone needs catching up
+                catch_up_ids = None
+            elif shard.connected_at is None:
+                # Still waiting to connect, carry its pending catch up forward with the new users
+                catch_up_ids = None if shard.catch_up_ids is None else (shard.catch_up_ids | added) & user_ids
+            elif shard.catch_up_task is None or shard.catch_up_task.done():
+                # Connected and caught up, only the new users are missing tweets
+                catch_up_ids = added & user_ids
+            else:
+                # Connected but still catching up, start over with everyone
+                catch_up_ids = None
+
+            self.shard_stop(shard)
+            if len(user_ids) > 0:
+                self.shard_start(shard, user_ids, catch_up_ids)
+
+    async def stream_tweets(self, shard):
         """Twitter stream daemon."""
         await self.bot.wait_until_ready()
-        async with self.twitter_client.stream.statuses.filter.post(follow=list(self.conf.follows.keys())) as stream:
+        async with shard.client.stream.statuses.filter.post(follow=list(shard.user_ids)) as stream:
             async for data in stream:
                 if peony.events.on_tweet(data):
-                    await self.dispatch_tweet(data)
+                    # The stream also sends the retweets of and replies to the followed users, by anyone
+                    if data['user']['id'] not in self.conf.follows:
+                        continue
+                    shard.on_tweet(data)
+                    self.delivery_queue.put(data)
                 elif peony.events.on_connect(data):
-                    await self.update_feeds()
+                    shard.on_connect()
+
+                    # Catch up on everyone unless told otherwise, e.g. after a follow change
+                    user_ids, shard.catch_up_ids = shard.catch_up_ids, None
+                    if user_ids is None or len(user_ids) > 0:
+                        self.catch_up_start(shard, user_ids)
+
+    async def deliver_tweets(self, worker_id):
+        """Tweet delivery daemon."""
+        while True:
+            queued_at, tweet = await self.delivery_queue.get(worker_id)
+            try:
+                await self.dispatch_tweet(tweet)
+            except Exception as e:
+                log.error(f'Failed to deliver tweet {tweet["id"]}: {e}')
+            self.delivery_queue.on_delivered(queued_at)
 
     @commands.command()
     @owner_in_guild()
     async def list(self, ctx):
         """Lists the followed channels on the server."""
         follows = {}
-        for conf in self.conf.follows.values():
-            for channel_id in set(conf.channels) & set(c.id for c in ctx.guild.text_channels):
-                follows.setdefault(discord.utils.get(ctx.guild.text_channels, id=channel_id), []).append(f'@\N{ZERO WIDTH SPACE}{conf.screen_name}')
+        for channel_id in self.index.guilds.get(ctx.guild.id, ()):
+            channel = ctx.guild.get_channel(channel_id)
+            if channel is not None:
+                follows[channel] = [f'@\N{ZERO WIDTH SPACE}{self.conf.follows[user_id].screen_name}' for user_id in self.index.channels[channel_id]]
 
         if len(follows) == 0:
             raise TwitterError('Not following any channel on this server.')
@@ -190,6 +556,32 @@ class Twitter(commands.Cog):
 
         await ctx.send(embed=embed)
 
+    @commands.command()
+    @commands.is_owner()
+    async def streams(self, ctx):
+        """Shows the stream connections' status."""
+        entries = []
+        for shard in self.shards:
+            if not self.shard_running(shard):
+                status = 'stopped'
+            elif shard.connected_at is None:
+                status = 'connecting'
+            else:
+                lag = 'n/a' if shard.lag is None else f'{shard.lag:.1f}s'
+                status = f'{shard.tweets} tweets ({shard.throughput:.1f}/min), lag {lag}'
+            entries.append((f'#{shard.id}', f'{len(shard.user_ids)} follows, {status}'))
+
+        queue = self.delivery_queue
+        latencies = queue.latencies
+        latency = f'{sum(latencies) / len(latencies):.2f}s avg, {max(latencies):.2f}s max' if latencies else 'n/a'
+        entries.append(('Queued', len(queue)))
+        entries.append(('Delivered', queue.delivered))
+        entries.append(('Dropped', queue.dropped))
+        entries.append(('Latency', latency))
+        entries.append(('Duplicates', f'{self.delivered.hits} skipped ({self.delivered.hit_rate:.2%} hit rate)'))
+
+        await ctx.send(utils.format_block(utils.indented_entry_to_str(entries)))
+
     @commands.command()
     async def search(self, ctx, query, limit: int = 5):
         """Searches for a Twitter user.
@@ -229,7 +621,8 @@ class Twitter(commands.Cog):
         sent to the channel this command was used in.
         """
         screen_name = handle.lower().lstrip('@')
-        user_id, conf = config.get(self.conf.follows, screen_name=screen_name)
+        user_id = self.index.screen_names.get(screen_name)
+        conf = self.conf.follows.get(user_id)
 
         if conf is not None and ctx.channel.id in conf.channels:
             raise TwitterError(f'Already following {screen_name} in this channel.')
@@ -245,19 +638,17 @@ class Twitter(commands.Cog):
             if user['protected']:
                 raise TwitterError('This user is protected and cannot be followed.')
 
-            conf = config.ConfigElement(screen_name=screen_name, channels={})
-            self.conf.follows[user['id']] = conf
-
-            tweet_url = build_tweet_url(screen_name, user["status"]["id"])
+            user_id = user['id']
             last_tweet_id = user['status']['id']
         else:
             last_tweet_id = max(c.last_tweet_id for c in conf.channels.values())
-            tweet_url = build_tweet_url(screen_name, last_tweet_id)
 
-        conf.channels[ctx.channel.id] = config.ConfigElement(last_tweet_id=last_tweet_id)
+        if self.add_follow(user_id, screen_name, ctx.channel, last_tweet_id):
+            self.stream_update(user_id)
         self.conf.save()
 
-        self.stream_restart()
+        tweet_url = build_tweet_url(screen_name, last_tweet_id)
+
         await ctx.send(tweet_url)
         await ctx.message.add_reaction('\N{WHITE HEAVY CHECK MARK}')
 
@@ -270,18 +661,13 @@ class Twitter(commands.Cog):
         sent to the channel this command was used in anymore.
         """
         screen_name = handle.lower().lstrip('@')
-        user_id, conf = config.get(self.conf.follows, screen_name=screen_name)
-        if conf is None:
-            raise TwitterError(f'Not following {screen_name} on this channel.')
-
-        try:
-            del conf.channels[ctx.channel.id]
-        except KeyError:
+        user_id = self.index.screen_names.get(screen_name)
+        conf = self.conf.follows.get(user_id)
+        if conf is None or ctx.channel.id not in conf.channels:
             raise TwitterError(f'Not following {screen_name} on this channel.')
 
-        if len(conf.channels) == 0:
-            del self.conf.follows[user_id]
-            self.stream_restart()
+        if self.remove_follow(user_id, ctx.channel.id):
+            self.stream_update()
         self.conf.save()
 
         await ctx.message.add_reaction('\N{WHITE HEAVY CHECK MARK}')
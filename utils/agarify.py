@@ -6,6 +6,8 @@ I would climb mountains to scream my thanks to you, but I'm afraid of taking ini
 You are no cause of anything but gratitude and joy for this amazingly addictive feature.
 """
 
+import itertools
+import operator
 import random
 import string
 
@@ -95,88 +97,135 @@ AGAR_SYMBOLS = [
 ]
 
 
+# Tables of characters precomputed from the code points above, so agarifying is only indexing and joining.
+# Tuples of characters rather than strings, as indexing them doesn't create a new string every time.
+AGAR_LETTERS = {letter: tuple(chr(alphabet[i]) for alphabet in AGAR_ALPHABETS) for i, letter in enumerate(string.ascii_uppercase)}
+AGAR_DIGITS = {digit: tuple(chr(numbers[i]) for numbers in AGAR_NUMBERS) for i, digit in enumerate(string.digits)}
+AGAR_SYMBOLS_TABLE = tuple(map(chr, AGAR_SYMBOLS))
+AGAR_PARENS_TABLE = [(chr(opening), chr(closing)) for opening, closing in AGAR_PARENS]
+
+# Characters replacing each character, anything missing is replaced by a symbol
+AGAR_REPLACEMENTS = {' ': (' ',), **AGAR_LETTERS, **AGAR_DIGITS}
+
+# Letters from any alphabet 80% of the time, letterlike symbols 20% of the time
+AGAR_CLAN_LETTERS = tuple(chr(c) for alphabet in AGAR_ALPHABETS for c in alphabet) + tuple(map(chr, AGAR_LETTERLIKE))
+AGAR_CLAN_CUM_WEIGHTS = list(itertools.accumulate(
+    [0.8 / (len(AGAR_ALPHABETS) * 26)] * (len(AGAR_ALPHABETS) * 26) + [0.2 / len(AGAR_LETTERLIKE)] * len(AGAR_LETTERLIKE)))
+
+
 def agar_wrap(inner, parens):
     """Utility function to wrap something in a pair of agar parentheses."""
-    inner.insert(0, parens[0])
-    inner.append(parens[1])
-
-
-def letter_or_letterlike():
-    """Generate a random letter or letterlike symbol."""
-    if random.randint(1, 10) > 2:
-        # Letter
-        return random.choice(random.choice(AGAR_ALPHABETS))
-    else:
-        # Letterlike
-        return random.choice(AGAR_LETTERLIKE)
-
-
-def agar_clan():
-    """ An agar clan name consists of :
-            * a random string of letters and letterlike symbols.
-            * optionally a regular symbol at the end.
-            * one or two pairs of parentheses surrounding it all.
-    """
-    # 3-4 letters or letterlikes
-    clan = [letter_or_letterlike() for i in range(0, random.randint(3, 4))]
-
-    # Optional symbol
-    if random.randint(1, 10) > 5:
-        clan.append(random.choice(AGAR_SYMBOLS))
-
-    # Parentheses
-    agar_wrap(clan, random.choice(AGAR_PARENS))
-
-    # Sometimes a second pair
-    if random.randint(1, 100) > 25:
-        agar_wrap(clan, random.choice(AGAR_PARENS))
-
-    return clan
-
-
-def agar_replace(line):
-    """Partially agarify a string by replacing letters and numbers with respective agar symbols."""
-    ulist = []
-
-    for char in line:
-        if char == ' ':
-            ulist.append(ord(' '))
-        elif char in string.ascii_uppercase:
-            ulist.append(random.choice(AGAR_ALPHABETS)[ord(char) - ord('A')])
-        elif char in string.digits:
-            ulist.append(random.choice(AGAR_NUMBERS)[int(char)])
-        else:
-            ulist.append(random.choice(AGAR_SYMBOLS))
+    return f'{parens[0]}{inner}{parens[1]}'
+
 
-    return ulist
+class Agarifier:
+    """Agarifies strings with its own random generator, seeded for reproducible results."""
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
 
+    def letter_or_letterlike(self, k=1):
+        """Generate a string of k random letters or letterlike symbols."""
+        return ''.join(self.random.choices(AGAR_CLAN_LETTERS, cum_weights=AGAR_CLAN_CUM_WEIGHTS, k=k))
 
-def generate_symbols():
-    """Generates 0-2 symbols, with 0 being more likely than 1 or 2."""
-    r = random.randint(1, 100)
-    if r > 50:
-        return []
-    elif r > 25:
-        return [random.choice(AGAR_SYMBOLS)]
-    else:
-        return random.sample(AGAR_SYMBOLS, 2)
+    def agar_clan(self):
+        """ An agar clan name consists of :
+                * a random string of letters and letterlike symbols.
+                * optionally a regular symbol at the end.
+                * one or two pairs of parentheses surrounding it all.
+        """
+        length, symbol, second_parens = self.random.random(), self.random.random(), self.random.random()
 
+        # 3-4 letters or letterlikes
+        clan = self.letter_or_letterlike(3 if length < 0.5 else 4)
 
-def agarify(line, add_clan=False):
-    """Agarifies a string.
-    Source : https://gist.github.com/PapyrusThePlant/e6a8790dbfce5a8c74193044bbecc5a1
-    """
-    ulist = agar_replace(line.upper())
+        # Optional symbol
+        if symbol < 0.5:
+            clan += self.random.choice(AGAR_SYMBOLS_TABLE)
 
-    # Add symbols randomly at the beginning and end
-    ulist = generate_symbols() + ulist
-    ulist = ulist + generate_symbols()
+        # Parentheses
+        clan = agar_wrap(clan, self.random.choice(AGAR_PARENS_TABLE))
 
-    if add_clan:
-        # Add the clan at the beginning
-        ulist = agar_clan() + ulist
-        # Rarely, add the clan again at the end
-        ulist += agar_clan() if random.randint(1, 100) <= 15 else []
+        # Sometimes a second pair
+        if second_parens < 0.75:
+            clan = agar_wrap(clan, self.random.choice(AGAR_PARENS_TABLE))
 
-    # Translate the unicode code points and return a string
-    return ''.join(chr(u) for u in ulist)
+        return clan
+
+    def agar_replace(self, line):
+        """Partially agarify a string by replacing letters and numbers with respective agar symbols."""
+        tables = list(map(AGAR_REPLACEMENTS.get, line, itertools.repeat(AGAR_SYMBOLS_TABLE)))
+
+        # Draw 32 random bits per character at once, their modulo a table's length is uniform enough over it
+        indices = memoryview(self.random.getrandbits(32 * len(line)).to_bytes(4 * len(line), 'little')).cast('I').tolist() if line else []
+
+        return ''.join(map(operator.getitem, tables, map(operator.mod, indices, map(len, tables))))
+
+    def generate_symbols(self):
+        """Generates 0-2 symbols, with 0 being more likely than 1 or 2."""
+        r = self.random.random()
+        if r < 0.5:
+            return ''
+        elif r < 0.75:
+            return self.random.choice(AGAR_SYMBOLS_TABLE)
+        else:
+            return ''.join(self.random.sample(AGAR_SYMBOLS_TABLE, 2))
+
+    def decorate(self, replaced, add_clan=False):
+        # Add symbols randomly at the beginning and end
+        agarified = self.generate_symbols() + replaced + self.generate_symbols()
+
+        if add_clan:
+            # Add the clan at the beginning
+            agarified = self.agar_clan() + agarified
+            # Rarely, add the clan again at the end
+            agarified += self.agar_clan() if self.random.random() < 0.15 else ''
+
+        return agarified
+
+    def agarify(self, line, add_clan=False):
+        """Agarifies a string.
+        Source : https://gist.github.com/PapyrusThePlant/e6a8790dbfce5a8c74193044bbecc5a1
+        """
+        return self.decorate(self.agar_replace(line.upper()), add_clan)
+
+    def agarify_many(self, lines, add_clan=False):
+        """Agarifies a list of strings, replacing the characters of all of them in a single pass."""
+        lines = [line.upper() for line in lines]
+
+        # Every character is replaced by a single one, so the replaced lines can be sliced back out
+        replaced = self.agar_replace(''.join(lines))
+        agarified = []
+        start = 0
+        for line in lines:
+            end = start + len(line)
+            agarified.append(self.decorate(replaced[start:end], add_clan))
+            start = end
+
+        return agarified
+
+
+# Module-level functions, sharing a default unseeded generator
+_agarifier = Agarifier()
+letter_or_letterlike = _agarifier.letter_or_letterlike
+agar_clan = _agarifier.agar_clan
+agar_replace = _agarifier.agar_replace
+generate_symbols = _agarifier.generate_symbols
+agarify = _agarifier.agarify
+agarify_many = _agarifier.agarify_many
+
+
+if __name__ == '__main__':
+    # Micro-benchmark of per-call and bulk throughput, run with python -m utils.agarify
+    import timeit
+
+    names = [f'Player {i} the Great' for i in range(1000)]
+    benchmark = Agarifier(seed=0)
+
+    for add_clan in (False, True):
+        per_call = min(timeit.repeat(lambda: [benchmark.agarify(name, add_clan) for name in names], number=10, repeat=5)) / 10
+        bulk = min(timeit.repeat(lambda: benchmark.agarify_many(names, add_clan), number=10, repeat=5)) / 10
+        print(f'{"with" if add_clan else "without"} clan:')
+        print(f'    per call: {len(names) / per_call:,.0f} names/s')
+        print(f'    bulk:     {len(names) / bulk:,.0f} names/s ({per_call / bulk:.2f}x)')
+
+    assert Agarifier(seed=42).agarify_many(names) == Agarifier(seed=42).agarify_many(names), 'seeded output is not reproducible'
@@ -1,8 +1,12 @@
 import collections
 import inspect
 import json
+import logging
 import operator
 import os
+import threading
+
+log = logging.getLogger(__name__)
 
 
 def get(iterable, **attrs):
@@ -20,7 +24,13 @@ def get(iterable, **attrs):
 
 
 class Config:
-    """The config object, created from a json file."""
+    """The config object, created from a json file.
+
+    When given a loop and a debounce delay (in seconds), saves are written behind:
+    the config is marked dirty and every save requested within the debounce window
+    is coalesced into a single write, done in the loop's default executor.
+    Call flush to write any pending change immediately, e.g. on shutdown.
+    """
 
     def __init__(self, file, **options):
         super().__setattr__('_data', {})
@@ -28,16 +38,68 @@ class Config:
         self.encoding = options.pop('encoding', None)
         self.object_hook = options.pop('object_hook', _ConfigDecoder().decode)
         self.encoder = options.pop('encoder', _ConfigEncoder)
+        self.loop = options.pop('loop', None)
+        self.debounce = options.pop('debounce', None)
+        self.dirty = False
+        self._flush_handle = None
+        self._write_lock = threading.Lock()
+        self._serialized = 0  # Sequence number of the last snapshot taken
+        self._written = 0  # Sequence number of the last snapshot written
 
         with open(self.file, 'r', encoding=self.encoding) as fp:
             self._data = json.load(fp, object_pairs_hook=self.object_hook)
 
     def save(self):
-        """Saves the config on disk."""
-        tmp_file = self.file + '~'
-        with open(tmp_file, 'w', encoding=self.encoding) as fp:
-            json.dump(self._data, fp, ensure_ascii=True, cls=self.encoder)
-        os.replace(tmp_file, self.file)
+        """Saves the config on disk, or schedules the save when writing behind."""
+        if self.loop is None or self.debounce is None or self.loop.is_closed():
+            self.flush()
+            return
+
+        self.dirty = True
+        if self._flush_handle is None:
+            self._flush_handle = self.loop.call_later(self.debounce, self._flush_behind)
+
+    def flush(self):
+        """Immediately writes the config on disk, cancelling any scheduled save."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self.dirty = False
+        self._write(*self._serialize())
+
+    def _flush_behind(self):
+        self._flush_handle = None
+        if not self.dirty:
+            return
+        self.dirty = False
+
+        # Serialize on the loop's thread as the data is only ever mutated there, then write in the executor
+        future = self.loop.run_in_executor(None, self._write, *self._serialize())
+        future.add_done_callback(self._on_written)
+
+    def _on_written(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            log.error(f'Failed to save {self.file}: {future.exception()}')
+            # Try again on the next window
+            self.save()
+
+    def _serialize(self):
+        # Number the snapshots so a write queued in the executor never overwrites a newer one
+        self._serialized += 1
+        return self._serialized, json.dumps(self._data, ensure_ascii=True, cls=self.encoder)
+
+    def _write(self, sequence, content):
+        with self._write_lock:
+            if sequence < self._written:
+                return
+
+            tmp_file = self.file + '~'
+            with open(tmp_file, 'w', encoding=self.encoding) as fp:
+                fp.write(content)
+                fp.flush()
+                os.fsync(fp.fileno())
+            os.replace(tmp_file, self.file)
+            self._written = sequence
 
     # utility
 
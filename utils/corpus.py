@@ -0,0 +1,121 @@
+"""
+In-memory line stores over the data files.
+"""
+import collections
+import heapq
+import itertools
+import os
+import random
+
+
+class LineCorpus:
+    """The non-empty lines of a text file, loaded once and reloaded when the file is modified.
+
+    If a key function is given, the lines are also bucketed by their key, to draw from a bucket in O(1).
+    """
+    def __init__(self, file_name, key=None):
+        self.file_name = file_name
+        self.key = key
+        self.mtime = None
+        self.lines = []
+        self.buckets = {}
+
+    def refresh(self):
+        """Reloads the file if it has been modified since it was last loaded."""
+        mtime = os.stat(self.file_name).st_mtime_ns
+        if mtime == self.mtime:
+            return
+
+        with open(self.file_name, 'r', encoding='utf-8') as file:
+            self.load([line for line in file.read().splitlines() if line])
+        self.mtime = mtime
+
+    def load(self, lines):
+        """Builds the in-memory structures from the file's lines."""
+        buckets = {}
+        if self.key is not None:
+            for line in lines:
+                buckets.setdefault(self.key(line), []).append(line)
+
+        self.lines, self.buckets = lines, buckets
+
+    def get_lines(self, bucket=None):
+        """Returns every line, or the lines of the given bucket."""
+        self.refresh()
+        return self.lines if bucket is None else self.buckets.get(bucket, [])
+
+    def choice(self, bucket=None):
+        """Randomly draws a line, from the given bucket if any."""
+        return random.choice(self.get_lines(bucket))
+
+    def sample(self, k, bucket=None):
+        """Randomly draws up to k distinct lines, from the given bucket if any."""
+        lines = self.get_lines(bucket)
+        return random.sample(lines, min(k, len(lines)))
+
+
+class RecordCorpus(LineCorpus):
+    """The records of a text file, one per line, with their fields separated by `sep`.
+
+    Records are namedtuples of the given columns. The records matching a set of filters, and their
+    cumulative weights, are computed on the first draw and kept until the file is reloaded.
+    """
+    def __init__(self, file_name, columns, sep='|'):
+        super().__init__(file_name)
+        self.record_type = collections.namedtuple('Record', columns)
+        self.sep = sep
+        self.records = []
+        self.populations = {}  # filters -> records
+        self.cum_weights = {}  # (filters, weights) -> cumulative weights
+
+    def load(self, lines):
+        super().load(lines)
+        maxsplit = len(self.record_type._fields) - 1
+        self.records = [self.record_type(*line.split(self.sep, maxsplit)) for line in lines]
+        self.populations.clear()
+        self.cum_weights.clear()
+
+    @staticmethod
+    def filters_key(filters):
+        # Filters set to None are ignored
+        return tuple(sorted((column, value) for column, value in filters.items() if value is not None))
+
+    def select(self, **filters):
+        """Returns the records whose columns have the given values."""
+        self.refresh()
+        key = self.filters_key(filters)
+        try:
+            return self.populations[key]
+        except KeyError:
+            population = [record for record in self.records if all(getattr(record, column) == value for column, value in key)]
+            return self.populations.setdefault(key, population)
+
+    def get_cum_weights(self, weights, **filters):
+        population = self.select(**filters)
+        key = (self.filters_key(filters), weights)
+        try:
+            return self.cum_weights[key]
+        except KeyError:
+            return self.cum_weights.setdefault(key, list(itertools.accumulate(weights(record) for record in population)))
+
+    def sample(self, k, replace=False, weights=None, **filters):
+        """Randomly draws k records matching the given filters.
+
+        Without replacement, fewer records are returned if not enough of them match.
+        `weights` is a function giving the weight of a record, and should be defined once rather
+        than per call so the cumulative weights computed from it are reused.
+        """
+        population = self.select(**filters)
+        if not population:
+            return []
+
+        if replace:
+            cum_weights = None if weights is None else self.get_cum_weights(weights, **filters)
+            return random.choices(population, cum_weights=cum_weights, k=k)
+
+        if weights is None:
+            return random.sample(population, min(k, len(population)))
+
+        # Weighted draw without replacement, keeping the k records with the highest random keys (Efraimidis-Spirakis)
+        keyed = ((random.random() ** (1 / w), record) for record, w in zip(population, map(weights, population)) if w > 0)
+        return [record for _, record in heapq.nlargest(k, keyed, key=lambda t: t[0])]
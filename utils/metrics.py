@@ -0,0 +1,99 @@
+"""
+Lightweight metrics, exportable in the Prometheus text format.
+"""
+import bisect
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def escape_label(value):
+    """Escapes a Prometheus label value."""
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+class Histogram:
+    """Cumulative histogram of observed values, with fixed buckets."""
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # The last one is the +Inf bucket
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimates a quantile by linear interpolation within its bucket, like Prometheus' histogram_quantile."""
+        if self.count == 0:
+            return None
+
+        rank = q * self.count
+        cumulated = 0
+        for i, count in enumerate(self.counts):
+            if cumulated + count >= rank and count > 0:
+                if i == len(self.buckets):
+                    # Can't interpolate in the +Inf bucket, return its lower bound
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulated) / count
+            cumulated += count
+        return self.buckets[-1]
+
+    def to_prometheus(self, name, labels=''):
+        """Returns the histogram's samples in the Prometheus text format."""
+        separator = ',' if labels else ''
+        lines = []
+        cumulated = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulated += count
+            lines.append(f'{name}_bucket{{{labels}{separator}le="{bound}"}} {cumulated}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class CommandMetrics:
+    """Latency, errors and concurrency of a command."""
+    def __init__(self):
+        self.latency = Histogram()
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @property
+    def error_rate(self):
+        return self.errors / self.latency.count if self.latency.count else 0.0
+
+    def on_start(self):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def on_end(self, duration, failed=False):
+        self.in_flight -= 1
+        self.latency.observe(duration)
+        if failed:
+            self.errors += 1
+
+
+def commands_to_prometheus(metrics, prefix='scarecrow'):
+    """Exports a {command name: CommandMetrics} dict in the Prometheus text format."""
+    lines = [
+        f'# HELP {prefix}_command_duration_seconds Time taken by the commands.',
+        f'# TYPE {prefix}_command_duration_seconds histogram'
+    ]
+    for name, command in metrics.items():
+        lines.extend(command.latency.to_prometheus(f'{prefix}_command_duration_seconds', f'command="{escape_label(name)}"'))
+
+    lines.append(f'# HELP {prefix}_command_errors_total Number of commands that raised an error.')
+    lines.append(f'# TYPE {prefix}_command_errors_total counter')
+    for name, command in metrics.items():
+        lines.append(f'{prefix}_command_errors_total{{command="{escape_label(name)}"}} {command.errors}')
+
+    lines.append(f'# HELP {prefix}_command_in_flight Number of commands currently running.')
+    lines.append(f'# TYPE {prefix}_command_in_flight gauge')
+    for name, command in metrics.items():
+        lines.append(f'{prefix}_command_in_flight{{command="{escape_label(name)}"}} {command.in_flight}')
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,83 @@
+"""
+Event loop health monitoring.
+"""
+import asyncio
+import collections
+import logging
+import sys
+import threading
+import time
+import traceback
+
+log = logging.getLogger(__name__)
+
+
+def format_frame(frame, limit=4):
+    """Formats the innermost entries of a frame's stack on a single line."""
+    if frame is None:
+        return 'unknown'
+    entries = traceback.extract_stack(frame)[-limit:]
+    return ' <- '.join(f'{e.name} ({e.filename}:{e.lineno})' for e in reversed(entries))
+
+
+class LoopMonitor:
+    """Watches an event loop for lag, and for the callbacks blocking it.
+
+    A coroutine measures the loop's lag from how late its sleeps wake up, while a watchdog thread
+    captures the stack of the loop's thread whenever that coroutine is late by more than `threshold`
+    seconds. That stack points to the coroutine or listener blocking the loop.
+    """
+    def __init__(self, loop, interval=0.5, threshold=0.25):
+        self.loop = loop
+        self.interval = interval
+        self.threshold = threshold
+        self.lags = collections.deque(maxlen=120)
+        self.stalls = collections.deque(maxlen=20)  # (timestamp, duration, location)
+        self._heartbeat = time.monotonic()
+        self._captured = (None, None)  # (heartbeat, location)
+        self._loop_thread_id = None
+        self._task = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        self._task = self.loop.create_task(self._sample())
+        threading.Thread(target=self._watch, name='loop-monitor', daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    @property
+    def max_lag(self):
+        return max(self.lags, default=0.0)
+
+    @property
+    def mean_lag(self):
+        return sum(self.lags) / len(self.lags) if self.lags else 0.0
+
+    async def _sample(self):
+        self._loop_thread_id = threading.get_ident()
+        while True:
+            heartbeat = self._heartbeat = time.monotonic()
+            start = self.loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(self.loop.time() - start - self.interval, 0.0)
+            self.lags.append(lag)
+
+            if lag > self.threshold:
+                captured_heartbeat, location = self._captured
+                location = location if captured_heartbeat == heartbeat else 'unknown'
+                self.stalls.append((time.time(), lag, location))
+                log.warning(f'Event loop blocked for {lag:.3f}s in {location}')
+
+    def _watch(self):
+        while not self._stopped.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            if self._loop_thread_id is None or self._captured[0] == heartbeat:
+                continue
+
+            # Capture the loop thread's stack once per stall, while it's still blocked
+            if time.monotonic() - heartbeat - self.interval > self.threshold:
+                frame = sys._current_frames().get(self._loop_thread_id)
+                self._captured = (heartbeat, format_frame(frame))
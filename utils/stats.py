@@ -0,0 +1,105 @@
+"""
+Statistics kept up to date from the gateway events.
+"""
+import collections
+
+
+class MemberStats:
+    """Member counts over every guild the bot is in.
+
+    The counts are computed once when the bot is ready, then maintained from
+    the member and guild events so they can be read without walking the members.
+    """
+    def __init__(self, bot):
+        self.bot = bot
+        self.members = 0
+        self.users = collections.Counter()  # user_id -> number of shared guilds
+        self.statuses = collections.Counter()  # status -> number of members
+        self.guild_statuses = {}  # guild_id -> Counter of status or status_bot -> number of members
+        self.guild_members = {}  # guild_id -> {user_id: (status, bot)}, what each guild contributed to the counts
+        self._keys = {}  # Interned (status, bot) tuples, shared by every member instead of one tuple each
+
+        for event in ('on_ready', 'on_guild_join', 'on_guild_remove', 'on_guild_available', 'on_guild_unavailable',
+                      'on_member_join', 'on_member_remove', 'on_member_update'):
+            bot.add_listener(getattr(self, event), event)
+
+    @property
+    def unique_users(self):
+        return len(self.users)
+
+    def shared_guilds(self, user_id):
+        return self.users.get(user_id, 0)
+
+    @staticmethod
+    def guild_status_key(status, bot):
+        return f'{status}{"_bot" if bot else ""}'
+
+    def add_member(self, member):
+        members = self.guild_members.setdefault(member.guild.id, {})
+        if member.id in members:
+            return
+        status = str(member.status)
+        key = (status, member.bot)
+        members[member.id] = self._keys.setdefault(key, key)
+
+        self.members += 1
+        self.users[member.id] += 1
+        self.statuses[status] += 1
+        self.guild_statuses.setdefault(member.guild.id, collections.Counter())[self.guild_status_key(status, member.bot)] += 1
+
+    def remove_member(self, guild_id, user_id):
+        try:
+            status, bot = self.guild_members[guild_id].pop(user_id)
+        except KeyError:
+            return
+
+        self.members -= 1
+        self.users[user_id] -= 1
+        if self.users[user_id] <= 0:
+            del self.users[user_id]
+        self.statuses[status] -= 1
+        self.guild_statuses[guild_id][self.guild_status_key(status, bot)] -= 1
+
+    def remove_guild(self, guild_id):
+        for user_id in list(self.guild_members.get(guild_id, ())):
+            self.remove_member(guild_id, user_id)
+        self.guild_members.pop(guild_id, None)
+        self.guild_statuses.pop(guild_id, None)
+
+    def recount_guild(self, guild):
+        # The guild's members may have been rebuilt without any member event, replace its whole contribution
+        self.remove_guild(guild.id)
+        for member in guild.members:
+            self.add_member(member)
+
+    async def on_ready(self):
+        self.members = 0
+        self.users.clear()
+        self.statuses.clear()
+        self.guild_statuses.clear()
+        self.guild_members.clear()
+        for member in self.bot.get_all_members():
+            self.add_member(member)
+
+    async def on_guild_join(self, guild):
+        self.recount_guild(guild)
+
+    async def on_guild_remove(self, guild):
+        self.remove_guild(guild.id)
+
+    async def on_guild_available(self, guild):
+        self.recount_guild(guild)
+
+    async def on_guild_unavailable(self, guild):
+        self.recount_guild(guild)
+
+    async def on_member_join(self, member):
+        self.add_member(member)
+
+    async def on_member_remove(self, member):
+        self.remove_member(member.guild.id, member.id)
+
+    async def on_member_update(self, before, after):
+        if before.status != after.status:
+            self.remove_member(after.guild.id, after.id)
+            self.add_member(after)
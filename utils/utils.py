@@ -8,6 +8,10 @@ import random
 import discord
 import discord.ext.commands as commands
 
+from utils import corpus
+
+_corpora = {}
+
 
 class AuditLogReason(commands.Converter):
     def __init__(self, details=None):
@@ -81,6 +85,45 @@ class HTTPError(Exception):
         return self._resp_msg
 
 
+class SessionStats:
+    """Connection pool statistics of an aiohttp session, gathered through its request tracing."""
+    def __init__(self):
+        self.created = 0
+        self.reused = 0
+        self.trace_config = aiohttp.TraceConfig()
+        self.trace_config.on_connection_create_end.append(self._on_connection_create_end)
+        self.trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+
+    async def _on_connection_create_end(self, session, context, params):
+        self.created += 1
+
+    async def _on_connection_reuseconn(self, session, context, params):
+        self.reused += 1
+
+    @property
+    def reuse_ratio(self):
+        total = self.created + self.reused
+        return self.reused / total if total else 0.0
+
+    @staticmethod
+    def open_connections(connector):
+        """Returns the number of connections in use and the number of idle connections kept alive by a connector."""
+        acquired = len(connector._acquired)
+        idle = sum(len(conns) for conns in connector._conns.values())
+        return acquired, idle
+
+
+async def bounded_gather(coros, limit, return_exceptions=False):
+    """Runs the given coroutines concurrently, with at most `limit` of them running at once."""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(run(coro) for coro in coros), return_exceptions=return_exceptions)
+
+
 def duration_to_str(duration):
     # Extract minutes, hours and days
     minutes, seconds = divmod(duration, 60)
@@ -145,12 +188,12 @@ def indented_entry_to_str(entries, indent=0, sep=' '):
 
 
 def random_line(file_name, predicate=None):
-    """Reservoir algorithm to randomly draw one line from a file."""
-    with open(file_name, 'r', encoding='utf-8') as file:
-        file = filter(predicate, file)
-        line = next(file)
-        for num, aline in enumerate(file):
-            if random.randrange(num + 2):
-                continue
-            line = aline
-    return line
+    """Randomly draws one line from a file, kept in memory for the next draws."""
+    try:
+        lines = _corpora[file_name].get_lines()
+    except KeyError:
+        lines = _corpora.setdefault(file_name, corpus.LineCorpus(file_name)).get_lines()
+
+    if predicate is not None:
+        lines = [line for line in lines if predicate(line)]
+    return random.choice(lines)